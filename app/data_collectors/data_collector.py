@@ -1,31 +1,50 @@
-import ccxt.async_support as ccxt
 import asyncio
-from sqlalchemy import create_engine
+import ccxt.async_support as ccxt
+import ccxt.pro as ccxtpro
 from sqlalchemy.orm import sessionmaker
 import logging
-from datetime import datetime
 
-from app.models.funding_rate_models import Base, PerpetualOHLCV, SpotOHLCV, FundingRate
-from config.settings import DATABASE_PATH, TRADING_PAIRS, get_api_credentials
+from app.database.bulk import bulk_upsert, funding_rate_mappings, ohlcv_mappings
+from app.database.engine import create_db_engine, init_db
+from app.models.funding_rate_models import PerpetualOHLCV, SpotOHLCV, FundingRate
+from app.utils.exchange import call_with_retry, load_markets_cached
+from app.utils import event_loop
+from config.settings import DATA_COLLECTION, PERP_SYMBOLS, SPOT_SYMBOLS, TRADING_PAIRS, get_api_credentials
 
 # Configure logging
 logging.basicConfig(level=logging.INFO, format='%(asctime)s - %(levelname)s - %(message)s')
 
+# Spot and perpetual symbols -> the trading pair name stored in the symbol column
+PAIR_BY_SYMBOL = {
+    symbol: pair
+    for pair, info in TRADING_PAIRS.items()
+    for symbol in (info['spot'], info['perpetual'])
+}
+
 async def fetch_ohlcv(exchange, symbol, timeframe='1m', since=None):
     
     try:
-        ohlcv = await exchange.fetch_ohlcv(symbol, timeframe, since=since)
+        ohlcv = await call_with_retry(exchange.fetch_ohlcv, symbol, timeframe, since=since)
         return ohlcv
     except ccxt.BaseError as e:
         logging.error(f"Error fetching OHLCV for {symbol}: {e}")
         return None
 
-async def collect_data():
-    """Collect and store OHLCV and funding rate data."""
+async def collect_data(engine=None):
+    """
+    Collect and store OHLCV and funding rate data.
+    
+    Args:
+        engine: Optional database engine with the schema already initialized,
+            shared with the caller and left open; by default a temporary one
+            is created and disposed of before returning
+    """
 
     # Create database session
-    engine = create_engine(DATABASE_PATH)
-    Base.metadata.create_all(engine)
+    owns_engine = engine is None
+    if owns_engine:
+        engine = create_db_engine()
+        init_db(engine)
     Session = sessionmaker(bind=engine)
 
     api_credentials = get_api_credentials()
@@ -36,29 +55,34 @@ async def collect_data():
     })
     
     # Collect data for each trading pair
-    async with exchange:
-        for pair, info in TRADING_PAIRS.items():
-            logging.info(f"Collecting data for {pair}")
-            try:
-                # Fetch Spot OHLCV
-                spot_ohlcv = await fetch_ohlcv(exchange, info['spot'], '1m')
-                # Fetch Perpetual OHLCV
-                perp_ohlcv = await fetch_ohlcv(exchange, info['perpetual'], '1m')
-                # Fetch Funding Rate
-                # Example using place holder function (implement funding rate fetch logic)
-                funding_rate_info = await fetch_funding_rate(exchange, info['perpetual'])
-                
-                # Store in database
-                store_ohlcv_and_funding(Session, pair, spot_ohlcv, perp_ohlcv, funding_rate_info)
-
-            except Exception as e:
-                logging.error(f"Failed to collect data for {pair}: {e}")
+    try:
+        async with exchange:
+            await load_markets_cached(exchange)
+            for pair, info in TRADING_PAIRS.items():
+                logging.info(f"Collecting data for {pair}")
+                try:
+                    # Fetch Spot OHLCV
+                    spot_ohlcv = await fetch_ohlcv(exchange, info['spot'], '1m')
+                    # Fetch Perpetual OHLCV
+                    perp_ohlcv = await fetch_ohlcv(exchange, info['perpetual'], '1m')
+                    # Fetch Funding Rate
+                    # Example using place holder function (implement funding rate fetch logic)
+                    funding_rate_info = await fetch_funding_rate(exchange, info['perpetual'])
+                    
+                    # Store in database
+                    store_ohlcv_and_funding(Session, pair, spot_ohlcv, perp_ohlcv, funding_rate_info)
+
+                except Exception as e:
+                    logging.error(f"Failed to collect data for {pair}: {e}")
+    finally:
+        if owns_engine:
+            engine.dispose()
 
 async def fetch_funding_rate(exchange, symbol):
     """Fetch the funding rate for a given symbol."""
     try:
         # Placeholder: Replace with actual logic to get funding rate and additional data
-        funding_rate = exchange.fetchFundingRate(symbol)
+        funding_rate = await call_with_retry(exchange.fetch_funding_rate, symbol)
         return funding_rate
     except ccxt.BaseError as e:
         logging.error(f"Error fetching funding rate for {symbol}: {e}")
@@ -69,42 +93,15 @@ def store_ohlcv_and_funding(Session, pair_name, spot_ohlcv_data, perp_ohlcv_data
     """Store collected data in the database."""
     session = Session()
     try:
-        for data in spot_ohlcv_data:
-            spot_ohlcv = SpotOHLCV(
-                symbol=pair_name,
-                timestamp=datetime.fromtimestamp(data[0] / 1000),
-                open=data[1],
-                high=data[2],
-                low=data[3],
-                close=data[4],
-                volume=data[5]
-            )
-            session.add(spot_ohlcv)
-
-        for data in perp_ohlcv_data:
-            perp_ohlcv = PerpetualOHLCV(
-                symbol=pair_name,
-                timestamp=datetime.fromtimestamp(data[0] / 1000),
-                open=data[1],
-                high=data[2],
-                low=data[3],
-                close=data[4],
-                volume=data[5],
-                mark_price=None,  # Replace with real mark price
-                index_price=None  # Replace with real index price
-            )
-            session.add(perp_ohlcv)
-
-        # Placeholder: Use real data instead
-        funding_rate = FundingRate(
-            symbol=pair_name,
-            timestamp=datetime.now(),  # Replace with real funding timestamp
-            funding_rate=funding_rate_info.get('funding_rate', 0),  # Replace with real data
-            perpetual_price=None,  # Replace with real perpetual price
-            spot_price=None,  # Replace with real spot price
-            basis_bps=None  # Replace with calculated basis
-        )
-        session.add(funding_rate)
+        bulk_upsert(session, SpotOHLCV, ohlcv_mappings(pair_name, spot_ohlcv_data))
+        bulk_upsert(session, PerpetualOHLCV, ohlcv_mappings(pair_name, perp_ohlcv_data, {
+            'mark_price': None,  # Replace with real mark price
+            'index_price': None  # Replace with real index price
+        }))
+
+        # fetch_funding_rate returns None on errors; still keep the candles
+        if funding_rate_info:
+            bulk_upsert(session, FundingRate, funding_rate_mappings(pair_name, [funding_rate_info]))
 
         session.commit()
         logging.info(f"Data for {pair_name} stored successfully.")
@@ -115,7 +112,130 @@ def store_ohlcv_and_funding(Session, pair_name, spot_ohlcv_data, perp_ohlcv_data
     finally:
         session.close()
 
+async def stream_data(engine=None):
+    """
+    Store live OHLCV and funding rate data pushed over Bybit's websocket streams.
+    
+    Candles are stored once they close, i.e. when the first update for the
+    next candle arrives. Funding rates come from the perpetual ticker stream
+    and are stored at most once per DATA_COLLECTION['funding_snapshot_interval']
+    seconds for each pair.
+    
+    Args:
+        engine: Optional database engine with the schema already initialized,
+            shared with the caller and left open; by default a temporary one
+            is created and disposed of when streaming stops
+    """
+    owns_engine = engine is None
+    if owns_engine:
+        engine = create_db_engine()
+        init_db(engine)
+    Session = sessionmaker(bind=engine)
+
+    api_credentials = get_api_credentials()
+    exchange = ccxtpro.bybit({
+        "apiKey": api_credentials['apiKey'],
+        "secret": api_credentials['secret'],
+        "enableRateLimit": True,
+    })
+    
+    try:
+        async with exchange:
+            await load_markets_cached(exchange)
+            await asyncio.gather(
+                _stream_ohlcv(exchange, Session, SpotOHLCV, SPOT_SYMBOLS),
+                _stream_ohlcv(exchange, Session, PerpetualOHLCV, PERP_SYMBOLS),
+                _stream_funding_rates(exchange, Session),
+            )
+    finally:
+        if owns_engine:
+            engine.dispose()
+
+async def _stream_ohlcv(exchange, Session, model, symbols):
+    """Store the candles of one market type as they close."""
+    timeframe = DATA_COLLECTION['interval']
+    subscriptions = [[symbol, timeframe] for symbol in symbols]
+    open_candles = {}  # symbol -> latest candle, still being updated
+    failures = 0
+    
+    while True:
+        try:
+            updates = await exchange.watch_ohlcv_for_symbols(subscriptions)
+            
+            for symbol, candles_by_timeframe in updates.items():
+                closed = []
+                for candle in candles_by_timeframe.get(timeframe, []):
+                    previous = open_candles.get(symbol)
+                    if previous is not None and candle[0] > previous[0]:
+                        closed.append(previous)
+                    open_candles[symbol] = candle
+                if closed:
+                    await asyncio.to_thread(
+                        store_rows, Session, model, ohlcv_mappings(PAIR_BY_SYMBOL[symbol], closed)
+                    )
+            failures = 0
+        
+        except Exception as e:
+            failures += 1
+            logging.error(f"{model.__tablename__} stream interrupted: {e}")
+            await asyncio.sleep(_stream_retry_delay(failures))
+
+async def _stream_funding_rates(exchange, Session):
+    """Store periodic funding rate snapshots from the perpetual ticker stream."""
+    interval_ms = DATA_COLLECTION['funding_snapshot_interval'] * 1000
+    last_stored = {}  # symbol -> ticker timestamp of the last stored snapshot
+    failures = 0
+    
+    while True:
+        try:
+            tickers = await exchange.watch_tickers(list(PERP_SYMBOLS))
+            
+            for symbol, ticker in tickers.items():
+                timestamp = ticker.get('timestamp')
+                if timestamp is None or timestamp - last_stored.get(symbol, 0) < interval_ms:
+                    continue
+                # Bybit's linear ticker carries fundingRate/nextFundingTime; parse it
+                # into the same structure fetch_funding_rate returns
+                funding_rate_info = exchange.parse_funding_rate(
+                    exchange.extend(ticker['info'], {'timestamp': timestamp})
+                )
+                if funding_rate_info['fundingRate'] is None:
+                    continue
+                last_stored[symbol] = timestamp
+                await asyncio.to_thread(
+                    store_rows, Session, FundingRate,
+                    funding_rate_mappings(PAIR_BY_SYMBOL[symbol], [funding_rate_info])
+                )
+            failures = 0
+        
+        except Exception as e:
+            failures += 1
+            logging.error(f"Funding rate stream interrupted: {e}")
+            await asyncio.sleep(_stream_retry_delay(failures))
+
+def _stream_retry_delay(failures):
+    """
+    Backoff before the next watch call after consecutive stream failures.
+    
+    Any error is retried, not just network ones: ccxt reconnects and
+    resubscribes on the next watch call, and one bad payload or exchange
+    error must not stop live collection for good.
+    """
+    return min(DATA_COLLECTION['retry_max_delay'], DATA_COLLECTION['retry_delay'] * 2 ** (failures - 1))
+
+def store_rows(Session, model, mappings):
+    """Store one batch of streamed rows in its own transaction."""
+    session = Session()
+    try:
+        bulk_upsert(session, model, mappings)
+        session.commit()
+    except Exception as e:
+        session.rollback()
+        logging.error(f"Failed to store {model.__tablename__} rows: {e}")
+    finally:
+        session.close()
+
 if __name__ == '__main__':
-    asyncio.run(collect_data())
+    event_loop.run(collect_data())
 
 # Note: This is a draft setup, replace placeholders with actual funding rate retrieval logic.
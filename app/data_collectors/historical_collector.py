@@ -1,33 +1,63 @@
 import ccxt.async_support as ccxt
 import asyncio
 import logging
-from datetime import datetime, timedelta
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
-import time
-import pandas as pd
+from datetime import datetime, timedelta, timezone
+from sqlalchemy import func, select
+from sqlalchemy.exc import SQLAlchemyError
+from sqlalchemy.ext.asyncio import async_sessionmaker
 
-from app.models.funding_rate_models import Base, PerpetualOHLCV, SpotOHLCV, FundingRate
+from app.database.bulk import bulk_upsert, funding_rate_mappings, ohlcv_mappings
+from app.database.engine import create_async_db_engine, init_async_db
+from app.models.funding_rate_models import PerpetualOHLCV, SpotOHLCV, FundingRate
+from app.utils.exchange import call_with_retry, create_http_session, load_markets_cached
+from app.utils import event_loop
 from config.settings import (
-    DATABASE_PATH, TRADING_PAIRS, get_api_credentials, 
-    DATA_COLLECTION, FUNDING_RATE
+    TRADING_PAIRS, get_api_credentials, 
+    DATA_COLLECTION, LOGS_DIR, ensure_dirs
 )
 
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO, 
-    format='%(asctime)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('logs/historical_collection.log'),
-        logging.StreamHandler()
-    ]
-)
+def setup_logging():
+    """
+    Log to logs/historical_collection.log as well as stderr.
+    
+    Called by the historical collection entry points, so importing this module
+    creates no directories or log files. Replaces root handlers installed
+    earlier, such as data_collector's stderr-only basicConfig.
+    """
+    ensure_dirs()
+    logging.basicConfig(
+        level=logging.INFO, 
+        format='%(asctime)s - %(levelname)s - %(message)s',
+        handlers=[
+            logging.FileHandler(LOGS_DIR / 'historical_collection.log'),
+            logging.StreamHandler()
+        ],
+        force=True
+    )
+
+# Parquet dataset names for the OHLCV tables
+OHLCV_MARKETS = {
+    SpotOHLCV: 'spot',
+    PerpetualOHLCV: 'perpetual',
+}
+
+def _to_millis(dt):
+    """Convert a naive UTC datetime to a millisecond epoch timestamp."""
+    return int(dt.replace(tzinfo=timezone.utc).timestamp() * 1000)
 
 class HistoricalDataCollector:
     def __init__(self):
-        self.engine = create_engine(DATABASE_PATH)
-        Base.metadata.create_all(self.engine)
-        self.Session = sessionmaker(bind=self.engine)
+        # Async engine: inserts and commits yield to the event loop instead of
+        # stalling every in-flight fetch
+        self.engine = create_async_db_engine()
+        self.Session = async_sessionmaker(self.engine, expire_on_commit=False)
+        
+        # OHLCV candles optionally go to a columnar Parquet dataset instead of SQL
+        self.parquet_store = None
+        if DATA_COLLECTION['ohlcv_storage'] == 'parquet':
+            # pyarrow is an optional extra; only import it when it is used
+            from app.database.parquet_store import OHLCVParquetStore
+            self.parquet_store = OHLCVParquetStore()
         
         # Initialize exchange
         credentials = get_api_credentials()
@@ -36,7 +66,6 @@ class HistoricalDataCollector:
             'secret': credentials['secret'],
             'testnet': credentials['testnet'],
             'enableRateLimit': True,
-            'options': {'defaultType': 'spot'}  # Will change as needed
         }
         
     async def collect_historical_data(self, days_back=180):
@@ -54,165 +83,249 @@ class HistoricalDataCollector:
         
         logging.info(f"Collection period: {start_time.strftime('%Y-%m-%d')} to {end_time.strftime('%Y-%m-%d')}")
         
-        async with ccxt.bybit(self.exchange_config) as exchange:
-            await exchange.load_markets()
+        # Separate clients per market type so concurrent pairs never race on
+        # a shared options['defaultType']
+        spot_config = {**self.exchange_config, 'options': {'defaultType': 'spot'}}
+        perp_config = {**self.exchange_config, 'options': {'defaultType': 'future'}}
+        semaphore = asyncio.Semaphore(DATA_COLLECTION['max_concurrent_pairs'])
+        # Caps in-flight OHLCV requests across all pairs; ccxt's rate limiter
+        # still governs overall request pacing
+        self._fetch_semaphore = asyncio.Semaphore(DATA_COLLECTION['max_concurrent_requests'])
+        
+        await init_async_db(self.engine)
+        
+        # Resume points for every pair with one aggregate query per table
+        if self.parquet_store:
+            latest_spot = {pair: self.parquet_store.latest_timestamp('spot', pair) for pair in TRADING_PAIRS}
+            latest_perp = {pair: self.parquet_store.latest_timestamp('perpetual', pair) for pair in TRADING_PAIRS}
+        else:
+            async with self.Session() as session:
+                latest_spot = await self._latest_timestamps(session, SpotOHLCV)
+                latest_perp = await self._latest_timestamps(session, PerpetualOHLCV)
+        
+        # Both clients share one keep-alive connection pool
+        async with create_http_session() as http_session, \
+                ccxt.bybit({**spot_config, 'session': http_session}) as spot_exchange, \
+                ccxt.bybit({**perp_config, 'session': http_session}) as perp_exchange:
+            await load_markets_cached(spot_exchange)
+            perp_exchange.set_markets(spot_exchange.markets, spot_exchange.currencies)
             
-            for pair_name, pair_info in TRADING_PAIRS.items():
-                logging.info(f"Collecting data for {pair_name}...")
-                
-                # Collect spot data
-                await self._collect_spot_data(exchange, pair_name, pair_info['spot'], start_time, end_time)
-                
-                # Collect perpetual data
-                await self._collect_perpetual_data(exchange, pair_name, pair_info['perpetual'], start_time, end_time)
-                
-                # Collect funding rate data
-                await self._collect_funding_rate_data(exchange, pair_name, pair_info['perpetual'], start_time, end_time)
-                
-                # Add delay between pairs to respect rate limits
-                await asyncio.sleep(1)
+            try:
+                await asyncio.gather(*(
+                    self._collect_pair(
+                        semaphore, spot_exchange, perp_exchange,
+                        pair_name, pair_info, start_time, end_time,
+                        latest_spot.get(pair_name), latest_perp.get(pair_name)
+                    )
+                    for pair_name, pair_info in TRADING_PAIRS.items()
+                ))
+            finally:
+                # Flush buffered candles and write the Parquet footers
+                if self.parquet_store:
+                    await asyncio.to_thread(self.parquet_store.close)
         
+        await self.engine.dispose()
         logging.info("Historical data collection completed!")
     
-    async def _collect_spot_data(self, exchange, pair_name, symbol, start_time, end_time):
+    async def _latest_timestamps(self, session, model):
+        """Return the most recent stored timestamp for each symbol in a table."""
+        rows = await session.execute(
+            select(model.symbol, func.max(model.timestamp)).group_by(model.symbol)
+        )
+        return dict(rows.all())
+    
+    async def _collect_pair(self, semaphore, spot_exchange, perp_exchange, pair_name, pair_info,
+                            start_time, end_time, latest_spot, latest_perp):
+        """Collect spot, perpetual and funding rate data for one trading pair."""
+        async with semaphore:
+            logging.info(f"Collecting data for {pair_name}...")
+            
+            # Spot, perpetual and funding data hit independent endpoints, so
+            # their round-trips can overlap
+            await asyncio.gather(
+                self._collect_spot_data(spot_exchange, pair_name, pair_info['spot'], start_time, end_time, latest_spot),
+                self._collect_perpetual_data(perp_exchange, pair_name, pair_info['perpetual'], start_time, end_time, latest_perp),
+                self._collect_funding_rate_data(perp_exchange, pair_name, pair_info['perpetual'], start_time, end_time),
+            )
+    
+    async def _collect_spot_data(self, exchange, pair_name, symbol, start_time, end_time, latest_timestamp):
         """Collect spot OHLCV data."""
         logging.info(f"  Collecting spot data for {symbol}...")
         
-        exchange.options['defaultType'] = 'spot'
-        
         try:
-            # Get existing data to avoid duplicates
-            session = self.Session()
-            latest_record = session.query(SpotOHLCV.timestamp).filter_by(
-                symbol=pair_name
-            ).order_by(SpotOHLCV.timestamp.desc()).first()
-            
-            # Determine start point
-            if latest_record:
-                collection_start = max(latest_record.timestamp, start_time)
-                logging.info(f"    Resuming from: {collection_start}")
-            else:
-                collection_start = start_time
-                logging.info(f"    Starting from: {collection_start}")
-            
-            session.close()
-            
-            # Collect data in batches
-            current_time = collection_start
-            total_records = 0
-            
-            while current_time < end_time:
-                batch_end = min(current_time + timedelta(hours=16), end_time)  # 16 hours per batch
+            # One session spans the whole pagination loop
+            async with self.Session() as session:
+                # Determine start point from the preloaded latest stored timestamp
+                if latest_timestamp:
+                    collection_start = max(latest_timestamp, start_time)
+                    logging.info(f"    Resuming from: {collection_start}")
+                else:
+                    collection_start = start_time
+                    logging.info(f"    Starting from: {collection_start}")
                 
-                try:
-                    since = int(current_time.timestamp() * 1000)
-                    limit = min(1000, DATA_COLLECTION['batch_size'])
-                    
-                    ohlcv_data = await exchange.fetch_ohlcv(
-                        symbol, 
-                        DATA_COLLECTION['interval'], 
-                        since=since, 
-                        limit=limit
-                    )
-                    
-                    if not ohlcv_data:
-                        logging.warning(f"    No data returned for {symbol} at {current_time}")
-                        break
-                    
-                    # Store data
-                    records_added = self._store_spot_data(pair_name, ohlcv_data)
-                    total_records += records_added
-                    
-                    # Update progress
-                    progress = ((current_time - collection_start) / (end_time - collection_start)) * 100
-                    logging.info(f"    Progress: {progress:.1f}% - Added {records_added} records")
-                    
-                    # Move to next batch
-                    if len(ohlcv_data) < limit:
-                        break  # No more data available
-                    
-                    current_time = datetime.fromtimestamp(ohlcv_data[-1][0] / 1000) + timedelta(minutes=1)
-                    
-                    # Rate limiting
-                    await asyncio.sleep(DATA_COLLECTION['rate_limit_delay'])
-                    
-                except Exception as e:
-                    logging.error(f"    Error collecting spot data batch: {e}")
-                    current_time += timedelta(hours=1)  # Skip ahead
-                    await asyncio.sleep(2)
+                # Collect data in batches
+                current_time = collection_start
+                committed_time = collection_start
+                total_records = 0
+                pending_records = 0
+                pending_batches = 0
+                store_failures = 0
+                
+                while current_time < end_time:
+                    try:
+                        since = _to_millis(current_time)
+                        limit = min(1000, DATA_COLLECTION['batch_size'])
+                        
+                        async with self._fetch_semaphore:
+                            ohlcv_data = await call_with_retry(
+                                exchange.fetch_ohlcv,
+                                symbol, 
+                                DATA_COLLECTION['interval'], 
+                                since=since, 
+                                limit=limit
+                            )
+                        
+                        if not ohlcv_data:
+                            logging.warning(f"    No data returned for {symbol} at {current_time}")
+                            break
+                        
+                        # Store data
+                        records_added = await self._store_ohlcv(session, SpotOHLCV, pair_name, ohlcv_data)
+                        pending_records += records_added
+                        pending_batches += 1
+                        
+                        # Update progress
+                        progress = ((current_time - collection_start) / (end_time - collection_start)) * 100
+                        logging.info(f"    Progress: {progress:.1f}% - Added {records_added} records")
+                        
+                        # Move to next batch
+                        if len(ohlcv_data) < limit:
+                            break  # No more data available
+                        
+                        current_time = datetime.utcfromtimestamp(ohlcv_data[-1][0] / 1000) + timedelta(minutes=1)
+                        
+                        if pending_batches >= DATA_COLLECTION['commit_every_batches']:
+                            await session.commit()
+                            committed_time = current_time
+                            total_records += pending_records
+                            pending_records = pending_batches = store_failures = 0
+                        
+                        # Rate limiting
+                        await asyncio.sleep(DATA_COLLECTION['rate_limit_delay'])
+                        
+                    except SQLAlchemyError as e:
+                        # The rollback discards every uncommitted batch, so re-fetch from the last commit
+                        await session.rollback()
+                        logging.error(f"    Error storing spot data: {e}")
+                        store_failures += 1
+                        if store_failures > DATA_COLLECTION['max_retries']:
+                            raise
+                        current_time = committed_time
+                        pending_records = pending_batches = 0
+                        await asyncio.sleep(DATA_COLLECTION['retry_delay'])
+                        
+                    except Exception as e:
+                        # Only reached once retries are exhausted or the error is not transient
+                        logging.error(f"    Error collecting spot data batch: {e}")
+                        current_time += timedelta(hours=1)  # Skip ahead
+                
+                await session.commit()
+                total_records += pending_records
             
             logging.info(f"  Spot data collection complete: {total_records} total records")
             
         except Exception as e:
             logging.error(f"  Failed to collect spot data for {symbol}: {e}")
     
-    async def _collect_perpetual_data(self, exchange, pair_name, symbol, start_time, end_time):
+    async def _collect_perpetual_data(self, exchange, pair_name, symbol, start_time, end_time, latest_timestamp):
         """Collect perpetual OHLCV data with mark and index prices."""
         logging.info(f"  Collecting perpetual data for {symbol}...")
         
-        exchange.options['defaultType'] = 'future'
-        
         try:
-            # Get existing data to avoid duplicates
-            session = self.Session()
-            latest_record = session.query(PerpetualOHLCV.timestamp).filter_by(
-                symbol=pair_name
-            ).order_by(PerpetualOHLCV.timestamp.desc()).first()
-            
-            # Determine start point
-            if latest_record:
-                collection_start = max(latest_record.timestamp, start_time)
-                logging.info(f"    Resuming from: {collection_start}")
-            else:
-                collection_start = start_time
-                logging.info(f"    Starting from: {collection_start}")
-            
-            session.close()
-            
-            # Collect data in batches
-            current_time = collection_start
-            total_records = 0
-            
-            while current_time < end_time:
-                try:
-                    since = int(current_time.timestamp() * 1000)
-                    limit = min(1000, DATA_COLLECTION['batch_size'])
-                    
-                    ohlcv_data = await exchange.fetch_ohlcv(
-                        symbol, 
-                        DATA_COLLECTION['interval'], 
-                        since=since, 
-                        limit=limit
-                    )
-                    
-                    if not ohlcv_data:
-                        logging.warning(f"    No perpetual data returned for {symbol} at {current_time}")
-                        break
-                    
-                    # Try to get mark price data (may not be available for historical)
-                    mark_prices = await self._get_mark_prices(exchange, symbol, ohlcv_data)
-                    
-                    # Store data
-                    records_added = self._store_perpetual_data(pair_name, ohlcv_data, mark_prices)
-                    total_records += records_added
-                    
-                    # Update progress
-                    progress = ((current_time - collection_start) / (end_time - collection_start)) * 100
-                    logging.info(f"    Progress: {progress:.1f}% - Added {records_added} records")
-                    
-                    # Move to next batch
-                    if len(ohlcv_data) < limit:
-                        break
-                    
-                    current_time = datetime.fromtimestamp(ohlcv_data[-1][0] / 1000) + timedelta(minutes=1)
-                    
-                    # Rate limiting
-                    await asyncio.sleep(DATA_COLLECTION['rate_limit_delay'])
-                    
-                except Exception as e:
-                    logging.error(f"    Error collecting perpetual data batch: {e}")
-                    current_time += timedelta(hours=1)
-                    await asyncio.sleep(2)
+            # One session spans the whole pagination loop
+            async with self.Session() as session:
+                # Determine start point from the preloaded latest stored timestamp
+                if latest_timestamp:
+                    collection_start = max(latest_timestamp, start_time)
+                    logging.info(f"    Resuming from: {collection_start}")
+                else:
+                    collection_start = start_time
+                    logging.info(f"    Starting from: {collection_start}")
+                
+                # Collect data in batches
+                current_time = collection_start
+                committed_time = collection_start
+                total_records = 0
+                pending_records = 0
+                pending_batches = 0
+                store_failures = 0
+                
+                while current_time < end_time:
+                    try:
+                        since = _to_millis(current_time)
+                        limit = min(1000, DATA_COLLECTION['batch_size'])
+                        
+                        async with self._fetch_semaphore:
+                            ohlcv_data = await call_with_retry(
+                                exchange.fetch_ohlcv,
+                                symbol, 
+                                DATA_COLLECTION['interval'], 
+                                since=since, 
+                                limit=limit
+                            )
+                        
+                        if not ohlcv_data:
+                            logging.warning(f"    No perpetual data returned for {symbol} at {current_time}")
+                            break
+                        
+                        # Try to get mark price data (may not be available for historical)
+                        mark_prices = await self._get_mark_prices(exchange, symbol, ohlcv_data)
+                        
+                        # Store data
+                        records_added = await self._store_ohlcv(session, PerpetualOHLCV, pair_name, ohlcv_data, {
+                            'mark_price': mark_prices,
+                            'index_price': None  # Will be populated later if available
+                        })
+                        pending_records += records_added
+                        pending_batches += 1
+                        
+                        # Update progress
+                        progress = ((current_time - collection_start) / (end_time - collection_start)) * 100
+                        logging.info(f"    Progress: {progress:.1f}% - Added {records_added} records")
+                        
+                        # Move to next batch
+                        if len(ohlcv_data) < limit:
+                            break
+                        
+                        current_time = datetime.utcfromtimestamp(ohlcv_data[-1][0] / 1000) + timedelta(minutes=1)
+                        
+                        if pending_batches >= DATA_COLLECTION['commit_every_batches']:
+                            await session.commit()
+                            committed_time = current_time
+                            total_records += pending_records
+                            pending_records = pending_batches = store_failures = 0
+                        
+                        # Rate limiting
+                        await asyncio.sleep(DATA_COLLECTION['rate_limit_delay'])
+                        
+                    except SQLAlchemyError as e:
+                        # The rollback discards every uncommitted batch, so re-fetch from the last commit
+                        await session.rollback()
+                        logging.error(f"    Error storing perpetual data: {e}")
+                        store_failures += 1
+                        if store_failures > DATA_COLLECTION['max_retries']:
+                            raise
+                        current_time = committed_time
+                        pending_records = pending_batches = 0
+                        await asyncio.sleep(DATA_COLLECTION['retry_delay'])
+                        
+                    except Exception as e:
+                        # Only reached once retries are exhausted or the error is not transient
+                        logging.error(f"    Error collecting perpetual data batch: {e}")
+                        current_time += timedelta(hours=1)
+                
+                await session.commit()
+                total_records += pending_records
             
             logging.info(f"  Perpetual data collection complete: {total_records} total records")
             
@@ -224,26 +337,17 @@ class HistoricalDataCollector:
         logging.info(f"  Collecting funding rate data for {symbol}...")
         
         try:
-            # Funding rates are published every 8 hours
-            funding_times = []
-            current = start_time.replace(hour=0, minute=0, second=0, microsecond=0)
-            
-            while current <= end_time:
-                for hour in [0, 8, 16]:  # Funding times
-                    funding_time = current.replace(hour=hour)
-                    if start_time <= funding_time <= end_time:
-                        funding_times.append(funding_time)
-                current += timedelta(days=1)
-            
             total_records = 0
             
             # Try to get historical funding rates (may be limited by exchange)
             try:
-                since = int(start_time.timestamp() * 1000)
-                funding_history = await exchange.fetch_funding_rate_history(symbol, since=since)
+                since = _to_millis(start_time)
+                funding_history = await call_with_retry(exchange.fetch_funding_rate_history, symbol, since=since)
                 
                 if funding_history:
-                    records_added = self._store_funding_rate_data(pair_name, funding_history)
+                    async with self.Session() as session:
+                        records_added = await self._store_funding_rates(session, pair_name, funding_history)
+                        await session.commit()
                     total_records += records_added
                     logging.info(f"    Stored {records_added} historical funding rate records")
                 else:
@@ -253,9 +357,11 @@ class HistoricalDataCollector:
                 logging.warning(f"    Historical funding rates not available: {e}")
                 # Fall back to current funding rate only
                 try:
-                    current_funding = await exchange.fetch_funding_rate(symbol)
+                    current_funding = await call_with_retry(exchange.fetch_funding_rate, symbol)
                     if current_funding:
-                        records_added = self._store_current_funding_rate(pair_name, current_funding)
+                        async with self.Session() as session:
+                            records_added = await self._store_funding_rates(session, pair_name, [current_funding])
+                            await session.commit()
                         total_records += records_added
                         logging.info(f"    Stored current funding rate")
                 except Exception as e2:
@@ -278,143 +384,24 @@ class HistoricalDataCollector:
             pass
         return [None] * len(ohlcv_data)
     
-    def _store_spot_data(self, pair_name, ohlcv_data):
-        """Store spot OHLCV data in database."""
-        session = self.Session()
-        records_added = 0
-        
-        try:
-            for data in ohlcv_data:
-                # Check if record already exists
-                timestamp = datetime.fromtimestamp(data[0] / 1000)
-                existing = session.query(SpotOHLCV).filter_by(
-                    symbol=pair_name, timestamp=timestamp
-                ).first()
-                
-                if not existing:
-                    spot_record = SpotOHLCV(
-                        symbol=pair_name,
-                        timestamp=timestamp,
-                        open=data[1],
-                        high=data[2],
-                        low=data[3],
-                        close=data[4],
-                        volume=data[5]
-                    )
-                    session.add(spot_record)
-                    records_added += 1
-            
-            session.commit()
-            
-        except Exception as e:
-            session.rollback()
-            logging.error(f"Error storing spot data: {e}")
-        finally:
-            session.close()
-        
-        return records_added
-    
-    def _store_perpetual_data(self, pair_name, ohlcv_data, mark_prices):
-        """Store perpetual OHLCV data in database."""
-        session = self.Session()
-        records_added = 0
-        
-        try:
-            for i, data in enumerate(ohlcv_data):
-                timestamp = datetime.fromtimestamp(data[0] / 1000)
-                existing = session.query(PerpetualOHLCV).filter_by(
-                    symbol=pair_name, timestamp=timestamp
-                ).first()
-                
-                if not existing:
-                    perp_record = PerpetualOHLCV(
-                        symbol=pair_name,
-                        timestamp=timestamp,
-                        open=data[1],
-                        high=data[2],
-                        low=data[3],
-                        close=data[4],
-                        volume=data[5],
-                        mark_price=mark_prices[i] if i < len(mark_prices) else None,
-                        index_price=None  # Will be populated later if available
-                    )
-                    session.add(perp_record)
-                    records_added += 1
-            
-            session.commit()
-            
-        except Exception as e:
-            session.rollback()
-            logging.error(f"Error storing perpetual data: {e}")
-        finally:
-            session.close()
+    async def _store_ohlcv(self, session, model, pair_name, ohlcv_data, extra_columns=None):
+        """Stage OHLCV candles in the caller's session (or the Parquet store); the caller commits."""
+        if self.parquet_store:
+            # pandas/pyarrow work is synchronous; keep it off the event loop
+            return await asyncio.to_thread(
+                self.parquet_store.write, OHLCV_MARKETS[model], pair_name, ohlcv_data, extra_columns
+            )
         
-        return records_added
+        return await session.run_sync(bulk_upsert, model, ohlcv_mappings(pair_name, ohlcv_data, extra_columns))
     
-    def _store_funding_rate_data(self, pair_name, funding_data):
-        """Store funding rate data in database."""
-        session = self.Session()
-        records_added = 0
-        
+    async def _store_funding_rates(self, session, pair_name, funding_data):
+        """Stage funding rate records in the caller's session; the caller commits."""
         try:
-            for data in funding_data:
-                timestamp = datetime.fromtimestamp(data['timestamp'] / 1000)
-                existing = session.query(FundingRate).filter_by(
-                    symbol=pair_name, timestamp=timestamp
-                ).first()
-                
-                if not existing:
-                    funding_record = FundingRate(
-                        symbol=pair_name,
-                        timestamp=timestamp,
-                        funding_rate=data.get('fundingRate', 0),
-                        predicted_rate=data.get('predictedRate'),
-                        perpetual_price=data.get('markPrice'),
-                        spot_price=data.get('indexPrice'),
-                        basis_bps=None  # Will calculate later
-                    )
-                    session.add(funding_record)
-                    records_added += 1
-            
-            session.commit()
+            return await session.run_sync(bulk_upsert, FundingRate, funding_rate_mappings(pair_name, funding_data))
             
         except Exception as e:
-            session.rollback()
+            await session.rollback()
             logging.error(f"Error storing funding rate data: {e}")
-        finally:
-            session.close()
-        
-        return records_added
-    
-    def _store_current_funding_rate(self, pair_name, funding_data):
-        """Store current funding rate data."""
-        session = self.Session()
-        
-        try:
-            timestamp = datetime.fromtimestamp(funding_data['timestamp'] / 1000)
-            existing = session.query(FundingRate).filter_by(
-                symbol=pair_name, timestamp=timestamp
-            ).first()
-            
-            if not existing:
-                funding_record = FundingRate(
-                    symbol=pair_name,
-                    timestamp=timestamp,
-                    funding_rate=funding_data.get('fundingRate', 0),
-                    predicted_rate=funding_data.get('predictedRate'),
-                    perpetual_price=funding_data.get('markPrice'),
-                    spot_price=funding_data.get('indexPrice'),
-                    basis_bps=None
-                )
-                session.add(funding_record)
-                session.commit()
-                return 1
-            
-        except Exception as e:
-            session.rollback()
-            logging.error(f"Error storing current funding rate: {e}")
-        finally:
-            session.close()
         
         return 0
 
@@ -424,4 +411,5 @@ async def collect_6_months_data():
     await collector.collect_historical_data(days_back=180)
 
 if __name__ == '__main__':
-    asyncio.run(collect_6_months_data())
+    setup_logging()
+    event_loop.run(collect_6_months_data())
@@ -0,0 +1,120 @@
+"""
+Bulk insert path shared by everything that stores (symbol, timestamp)-keyed
+market data: OHLCV candles and funding rates.
+"""
+
+import pandas as pd
+from sqlalchemy import insert, select
+from sqlalchemy.dialects.postgresql import insert as postgresql_insert
+from sqlalchemy.dialects.sqlite import insert as sqlite_insert
+
+# Dialect-specific INSERT constructs that support ON CONFLICT DO NOTHING
+UPSERT_INSERTS = {
+    'sqlite': sqlite_insert,
+    'postgresql': postgresql_insert,
+}
+
+
+def _to_datetimes(milliseconds):
+    """Convert epoch milliseconds to naive UTC datetimes in one vectorized call."""
+    return pd.to_datetime(milliseconds, unit='ms').to_pydatetime()
+
+
+def ohlcv_mappings(pair_name, ohlcv_data, extra_columns=None):
+    """
+    Build insert mappings from ccxt OHLCV rows.
+    
+    Args:
+        pair_name (str): Trading pair stored in the symbol column
+        ohlcv_data (list): ccxt rows of [timestamp_ms, open, high, low, close, volume]
+        extra_columns (dict): Optional column name -> per-row list or a single value for all rows
+    """
+    if not ohlcv_data:
+        return []
+    
+    timestamps = _to_datetimes([data[0] for data in ohlcv_data])
+    mappings = [
+        {
+            'symbol': pair_name,
+            'timestamp': timestamp,
+            'open': data[1],
+            'high': data[2],
+            'low': data[3],
+            'close': data[4],
+            'volume': data[5]
+        }
+        for timestamp, data in zip(timestamps, ohlcv_data)
+    ]
+    
+    for name, values in (extra_columns or {}).items():
+        if isinstance(values, list):
+            for i, mapping in enumerate(mappings):
+                mapping[name] = values[i] if i < len(values) else None
+        else:
+            for mapping in mappings:
+                mapping[name] = values
+    
+    return mappings
+
+
+def funding_rate_mappings(pair_name, funding_data):
+    """Build insert mappings from ccxt funding rate structures."""
+    if not funding_data:
+        return []
+    
+    timestamps = _to_datetimes([data['timestamp'] for data in funding_data])
+    return [
+        {
+            'symbol': pair_name,
+            'timestamp': timestamp,
+            'funding_rate': data.get('fundingRate', 0),
+            'predicted_rate': data.get('predictedRate'),
+            'perpetual_price': data.get('markPrice'),
+            'spot_price': data.get('indexPrice'),
+            'basis_bps': None  # Will calculate later
+        }
+        for timestamp, data in zip(timestamps, funding_data)
+    ]
+
+
+def bulk_upsert(session, model, mappings):
+    """
+    Insert rows for one symbol, skipping (symbol, timestamp) pairs already stored.
+    
+    The statement runs in the caller's session; committing is left to the caller.
+    
+    Returns:
+        int: Number of rows actually inserted
+    """
+    if not mappings:
+        return 0
+    
+    # Core statements against the Table: rows stay plain dicts and never
+    # become instrumented ORM objects
+    table = model.__table__
+    dialect = session.get_bind().dialect
+    
+    if dialect.name in UPSERT_INSERTS:
+        # Let the unique constraint drop duplicates inside the database
+        stmt = UPSERT_INSERTS[dialect.name](table).on_conflict_do_nothing(
+            index_elements=['symbol', 'timestamp']
+        )
+        if dialect.insert_executemany_returning:
+            # Executemany form uses SQLAlchemy's batched "insertmanyvalues"
+            # path; RETURNING only yields ids for rows that were new
+            return len(session.execute(stmt.returning(table.c.id), mappings).all())
+        return session.execute(stmt.values(mappings)).rowcount
+    
+    # No ON CONFLICT support: fetch the batch window's stored timestamps
+    # with one range query and filter in Python
+    timestamps = [mapping['timestamp'] for mapping in mappings]
+    existing = set(session.scalars(
+        select(table.c.timestamp).where(
+            table.c.symbol == mappings[0]['symbol'],
+            table.c.timestamp.between(min(timestamps), max(timestamps))
+        )
+    ))
+    new_rows = [mapping for mapping in mappings if mapping['timestamp'] not in existing]
+    if new_rows:
+        session.execute(insert(table), new_rows)
+    return len(new_rows)
@@ -0,0 +1,113 @@
+"""
+Database engine construction and schema setup shared by the data collectors.
+"""
+
+from sqlalchemy import create_engine, event, text
+from sqlalchemy.engine import make_url
+from sqlalchemy.ext.asyncio import create_async_engine
+
+from app.models.funding_rate_models import Base
+from config.settings import DATABASE_PATH, DATABASE_POOL, SQLITE_PRAGMAS
+
+# Redundant (symbol, timestamp DESC) indexes an earlier schema created; the
+# unique constraint and idx_*_symbol_time already serve latest-first scans
+OBSOLETE_INDEXES = (
+    'idx_spot_symbol_time_desc',
+    'idx_perpetual_symbol_time_desc',
+    'idx_funding_symbol_time_desc',
+)
+
+# asyncio DBAPI drivers for each supported backend
+ASYNC_DRIVERS = {
+    'sqlite': 'aiosqlite',
+    'postgresql': 'asyncpg',
+}
+
+
+def create_db_engine(database_path=DATABASE_PATH):
+    """Create a pooled engine that lets concurrent collectors write without serializing."""
+    url = make_url(database_path)
+    is_sqlite = url.get_backend_name() == 'sqlite'
+    
+    dialect_options = {}
+    if url.get_backend_name() == 'postgresql' and url.get_driver_name() == 'psycopg2':
+        # Send executemany-style inserts as multi-row VALUES pages instead of
+        # one server round-trip per row
+        dialect_options = {
+            'executemany_mode': 'values_plus_batch',
+            'insertmanyvalues_page_size': 1000,
+            'executemany_batch_page_size': 500,
+        }
+    
+    engine = create_engine(
+        url,
+        pool_size=DATABASE_POOL['pool_size'],
+        max_overflow=DATABASE_POOL['max_overflow'],
+        pool_pre_ping=DATABASE_POOL['pool_pre_ping'],
+        pool_recycle=DATABASE_POOL['pool_recycle'],
+        connect_args={'check_same_thread': False} if is_sqlite else {},
+        **dialect_options
+    )
+    
+    if is_sqlite:
+        _enable_sqlite_wal(engine)
+    
+    return engine
+
+
+def create_async_db_engine(database_path=DATABASE_PATH):
+    """Create a pooled asyncio engine so DB writes overlap with exchange requests."""
+    url = make_url(database_path)
+    backend = url.get_backend_name()
+    if backend not in ASYNC_DRIVERS:
+        raise ValueError(f"No asyncio driver configured for database backend '{backend}'")
+    url = url.set(drivername=f"{backend}+{ASYNC_DRIVERS[backend]}")
+    
+    engine = create_async_engine(
+        url,
+        pool_size=DATABASE_POOL['pool_size'],
+        max_overflow=DATABASE_POOL['max_overflow'],
+        pool_pre_ping=DATABASE_POOL['pool_pre_ping'],
+        pool_recycle=DATABASE_POOL['pool_recycle'],
+    )
+    
+    if backend == 'sqlite':
+        _enable_sqlite_wal(engine.sync_engine)
+    
+    return engine
+
+
+def _enable_sqlite_wal(engine):
+    @event.listens_for(engine, 'connect')
+    def _set_sqlite_pragmas(dbapi_connection, connection_record):
+        cursor = dbapi_connection.cursor()
+        for pragma, value in SQLITE_PRAGMAS.items():
+            cursor.execute(f'PRAGMA {pragma}={value}')
+        cursor.close()
+
+
+def init_db(engine):
+    """
+    Create missing tables and indexes.
+    
+    create_all() skips tables that already exist, so indexes added to a model
+    after its table was created are created here individually, and the ones
+    in OBSOLETE_INDEXES are dropped.
+    """
+    with engine.begin() as connection:
+        _create_schema(connection)
+
+
+async def init_async_db(engine):
+    """Async counterpart of init_db for engines from create_async_db_engine."""
+    async with engine.begin() as connection:
+        await connection.run_sync(_create_schema)
+
+
+def _create_schema(connection):
+    Base.metadata.create_all(connection)
+    for table in Base.metadata.sorted_tables:
+        for index in table.indexes:
+            index.create(connection, checkfirst=True)
+    for name in OBSOLETE_INDEXES:
+        connection.execute(text(f'DROP INDEX IF EXISTS {name}'))
@@ -0,0 +1,150 @@
+"""
+Columnar Parquet storage for OHLCV candles.
+
+Each collection run appends to one Parquet file per market and trading pair
+under data/<market>/<pair>/, through a ParquetWriter that stays open until
+close(). Batches are buffered into large row groups, so a long backfill
+produces a few well-compressed files instead of one small file per fetch.
+"""
+
+from pathlib import Path
+
+import pandas as pd
+import pyarrow as pa
+import pyarrow.parquet as pq
+
+from config.settings import DATA_DIR
+
+OHLCV_COLUMNS = ['timestamp', 'open', 'high', 'low', 'close', 'volume']
+
+
+class OHLCVParquetStore:
+    """
+    Append-only Parquet dataset of OHLCV candles per market and trading pair.
+    
+    A file is only readable once close() has written its footer, so call it
+    when the collection run ends and before read().
+    """
+    
+    def __init__(self, root=DATA_DIR, compression='zstd', row_group_size=100_000):
+        self.root = Path(root)
+        self.compression = compression
+        self.row_group_size = row_group_size
+        # (market, pair) -> open writer, buffered tables and newest stored candle
+        self._writers = {}
+        self._pending = {}
+        self._latest_ms = {}
+    
+    def _pair_dir(self, market, pair_name):
+        return self.root / market / pair_name.replace('/', '_')
+    
+    def latest_timestamp_ms(self, market, pair_name):
+        """Return the newest stored candle time in epoch milliseconds, or None."""
+        key = (market, pair_name)
+        if key not in self._latest_ms:
+            # Read once per run from the row group statistics, then tracked in memory
+            self._latest_ms[key] = self._stored_latest_ms(market, pair_name)
+        return self._latest_ms[key]
+    
+    def _stored_latest_ms(self, market, pair_name):
+        pair_dir = self._pair_dir(market, pair_name)
+        if not pair_dir.exists():
+            return None
+        
+        latest = None
+        for path in pair_dir.glob('*.parquet'):
+            metadata = pq.ParquetFile(path).metadata
+            column = metadata.schema.names.index('timestamp')
+            for i in range(metadata.num_row_groups):
+                statistics = metadata.row_group(i).column(column).statistics
+                if statistics is not None and statistics.has_min_max:
+                    value = pd.Timestamp(statistics.max).value // 1_000_000
+                    latest = value if latest is None else max(latest, value)
+        return latest
+    
+    def latest_timestamp(self, market, pair_name):
+        """Return the newest stored candle time as a naive UTC datetime, or None."""
+        latest_ms = self.latest_timestamp_ms(market, pair_name)
+        if latest_ms is None:
+            return None
+        return pd.Timestamp(latest_ms, unit='ms').to_pydatetime()
+    
+    def write(self, market, pair_name, ohlcv_data, extra_columns=None):
+        """
+        Append a batch of ccxt OHLCV rows.
+        
+        Args:
+            market (str): Dataset name, e.g. 'spot' or 'perpetual'
+            pair_name (str): Trading pair, e.g. 'BTC/USDT'
+            ohlcv_data (list): ccxt rows of [timestamp_ms, open, high, low, close, volume]
+            extra_columns (dict): Optional column name -> per-row values
+        
+        Returns:
+            int: Number of new candles written
+        """
+        df = pd.DataFrame(ohlcv_data, columns=OHLCV_COLUMNS)
+        for name, values in (extra_columns or {}).items():
+            df[name] = values
+        
+        # Keep a stable float schema across batches, with None stored as NaN
+        value_columns = [column for column in df.columns if column != 'timestamp']
+        df = df.astype({column: 'float64' for column in value_columns})
+        
+        # Candles at or before the newest stored one are already on disk
+        key = (market, pair_name)
+        latest_ms = self.latest_timestamp_ms(market, pair_name)
+        if latest_ms is not None:
+            df = df[df['timestamp'] > latest_ms]
+        if df.empty:
+            return 0
+        
+        first_ms = int(df['timestamp'].iloc[0])
+        self._latest_ms[key] = int(df['timestamp'].iloc[-1])
+        df['timestamp'] = pd.to_datetime(df['timestamp'], unit='ms')
+        table = pa.Table.from_pandas(df, preserve_index=False)
+        
+        if key not in self._writers:
+            pair_dir = self._pair_dir(market, pair_name)
+            pair_dir.mkdir(parents=True, exist_ok=True)
+            self._writers[key] = pq.ParquetWriter(
+                pair_dir / f"{first_ms}.parquet",
+                table.schema,
+                compression=self.compression
+            )
+            self._pending[key] = []
+        else:
+            table = table.cast(self._writers[key].schema)
+        
+        self._pending[key].append(table)
+        if sum(pending.num_rows for pending in self._pending[key]) >= self.row_group_size:
+            self._flush(key)
+        return len(df)
+    
+    def _flush(self, key):
+        pending = self._pending[key]
+        if pending:
+            self._writers[key].write_table(pa.concat_tables(pending))
+            pending.clear()
+    
+    def close(self):
+        """Write out buffered candles and finalize every file opened by this store."""
+        for key, writer in self._writers.items():
+            self._flush(key)
+            writer.close()
+        self._writers.clear()
+        self._pending.clear()
+    
+    def read(self, market, pair_name, start=None, end=None):
+        """Load stored candles for a pair as a DataFrame sorted by timestamp."""
+        pair_dir = self._pair_dir(market, pair_name)
+        if not pair_dir.exists():
+            return pd.DataFrame(columns=OHLCV_COLUMNS)
+        
+        filters = []
+        if start is not None:
+            filters.append(('timestamp', '>=', pd.Timestamp(start)))
+        if end is not None:
+            filters.append(('timestamp', '<=', pd.Timestamp(end)))
+        
+        df = pd.read_parquet(pair_dir, engine='pyarrow', filters=filters or None)
+        return df.sort_values('timestamp', ignore_index=True)
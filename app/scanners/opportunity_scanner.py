@@ -6,36 +6,95 @@ This scanner monitors real-time funding rates, spot-futures spreads, and identif
 profitable arbitrage opportunities across different trading pairs on Bybit.
 """
 
-import ccxt.async_support as ccxt
 import asyncio
 import logging
-from datetime import datetime, timedelta
+from collections import deque
+from datetime import datetime, timedelta, timezone
 from dataclasses import dataclass
-from typing import Dict, List, Optional, Tuple
+from types import MappingProxyType
+from typing import Any, Dict, List, Mapping, Optional, Tuple
 import json
-from sqlalchemy import create_engine
-from sqlalchemy.orm import sessionmaker
+import time
+import numpy as np
+from sqlalchemy import bindparam, text
 
-# Add project root to path
-import sys
-import os
-sys.path.insert(0, os.path.abspath(os.path.join(os.path.dirname(__file__), '../..')))
+from app.database.engine import create_db_engine, init_db
+from app.utils.exchange import close_exchanges, get_exchange, throttled
+from app.utils import event_loop
+from app.utils.log_queue import start_queue_listener
+from config.settings import ANNUAL_FUNDING_PCT_MULT, LOGS_DIR, PAIR_NAMES, PERP_SYMBOLS, SPOT_SYMBOLS, ensure_dirs
 
-from app.models.funding_rate_models import Base, PerpetualOHLCV, SpotOHLCV, FundingRate
-from config.settings import DATABASE_PATH, TRADING_PAIRS, get_api_credentials
-
-# Configure logging
-logging.basicConfig(
-    level=logging.INFO,
-    format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-    handlers=[
-        logging.FileHandler('logs/opportunity_scanner.log'),
-        logging.StreamHandler()
-    ]
-)
 logger = logging.getLogger(__name__)
+_logging_configured = False
+
+
+def setup_logging():
+    """
+    Send the scanner's log records to logs/opportunity_scanner.log and stderr.
+    
+    Entry points call this once at startup; importing the module leaves
+    logging untouched. Later calls do nothing.
+    """
+    global _logging_configured
+    if _logging_configured:
+        return
+    
+    ensure_dirs()
+    logging.basicConfig(
+        level=logging.INFO,
+        format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
+        handlers=[start_queue_listener([
+            logging.FileHandler(LOGS_DIR / 'opportunity_scanner.log'),
+            logging.StreamHandler()
+        ])]
+    )
+    _logging_configured = True
+
+
+# Default scanner configuration; OpportunityScanner(config=...) overrides entries
+DEFAULT_SCANNER_CONFIG = MappingProxyType({
+    'min_funding_rate': 0.0001,  # 0.01% (3.65% annually)
+    'min_basis_bps': 5,  # 5 basis points
+    'max_risk_score': 7,  # Maximum acceptable risk
+    'min_volume_24h': 1000000,  # $1M minimum daily volume
+    'max_spread_bps': 10,  # Maximum bid-ask spread
+    'scan_interval': 30,  # Scan every 30 seconds
+    'funding_rate_cache_ttl': 300,  # Funding rates settle every 8h; refetch every 5 minutes
+})
+
+# Settled funding rates kept per pair for volatility and trend checks
+FUNDING_HISTORY_DEPTH = 10
 
-@dataclass
+# Latest funding rates per pair, oldest first; plain SQL skips ORM row hydration
+FUNDING_HISTORY_SQL = text("""
+    SELECT symbol, funding_rate FROM (
+        SELECT symbol, funding_rate, timestamp,
+               ROW_NUMBER() OVER (PARTITION BY symbol ORDER BY timestamp DESC) AS recency
+        FROM funding_rates
+        WHERE symbol IN :symbols AND funding_rate IS NOT NULL
+    ) AS recent
+    WHERE recency <= :depth
+    ORDER BY symbol, timestamp
+""").bindparams(bindparam('symbols', expanding=True))
+
+def _make_threshold_checks(config: dict):
+    """Bind the scanner thresholds into predicates so the per-pair checks read closure locals."""
+    min_funding_rate = config['min_funding_rate']
+    min_volume_24h = config['min_volume_24h']
+    max_spread_bps = config['max_spread_bps']
+    max_risk_score = config['max_risk_score']
+    
+    def passes_market_thresholds(funding_rate: float, volume_24h: float, avg_spread: float) -> bool:
+        return not (abs(funding_rate) < min_funding_rate
+                    or volume_24h < min_volume_24h
+                    or avg_spread > max_spread_bps)
+    
+    def passes_risk_threshold(risk_score: float) -> bool:
+        return not risk_score > max_risk_score
+    
+    return passes_market_thresholds, passes_risk_threshold
+
+@dataclass(frozen=True, slots=True)
 class ArbitrageOpportunity:
     """Represents a funding rate arbitrage opportunity."""
     symbol: str
@@ -61,126 +120,237 @@ class ArbitrageOpportunity:
     # Additional data
     volume_24h: float
     bid_ask_spread: float
-    funding_history: List[float]  # Recent funding rates
+    funding_history: Tuple[float, ...]  # Recent funding rates (a tuple, so opportunities stay hashable)
     timestamp: datetime
 
 class OpportunityScanner:
-    def __init__(self):
-        # Database setup
-        self.engine = create_engine(DATABASE_PATH)
-        Base.metadata.create_all(self.engine)
-        self.Session = sessionmaker(bind=self.engine)
-        
-        # Exchange setup
-        credentials = get_api_credentials()
-        self.exchange_config = {
-            'apiKey': credentials['apiKey'],
-            'secret': credentials['secret'],
-            'testnet': credentials['testnet'],
-            'enableRateLimit': True,
-        }
-        
-        # Scanner configuration
-        self.config = {
-            'min_funding_rate': 0.0001,  # 0.01% (3.65% annually)
-            'min_basis_bps': 5,  # 5 basis points
-            'max_risk_score': 7,  # Maximum acceptable risk
-            'min_volume_24h': 1000000,  # $1M minimum daily volume
-            'max_spread_bps': 10,  # Maximum bid-ask spread
-            'scan_interval': 30,  # Scan every 30 seconds
-        }
-        
-        # Store recent opportunities for trend analysis
-        self.recent_opportunities = []
+    def __init__(self, config: Optional[Mapping[str, Any]] = None):
+        """
+        Args:
+            config: Optional overrides merged over the default scanner
+                configuration (e.g. a threshold preset)
+        """
+        # Database setup, only read once below to seed the funding history
+        # (WAL on SQLite, so that read never waits on a collector's write)
+        self.engine = create_db_engine()
+        init_db(self.engine)
+        
+        # Exchange setup: the process-wide client is fetched on the first scan
+        # and reused with its connection pool and markets
+        self.exchange = None
+        
+        # Scanner configuration (a private copy callers may still adjust)
+        self.config = dict(DEFAULT_SCANNER_CONFIG)
+        if config:
+            self.config.update(config)
+        # Rebuilt at the start of every scan, so config changes made after
+        # construction still apply
+        self._passes_market_thresholds, self._passes_risk_threshold = _make_threshold_checks(self.config)
+        
+        # Store the last 100 opportunities for trend analysis
+        self.recent_opportunities: deque = deque(maxlen=100)
         self.market_cache = {}
+        # futures symbol -> (monotonic fetch time, funding rate info)
+        self._funding_rate_cache: Dict[str, Tuple[float, dict]] = {}
+        
+        # Flattened (pair, spot symbol, perpetual symbol, row) tuples for the scan loop
+        self._pairs = list(zip(PAIR_NAMES, SPOT_SYMBOLS, PERP_SYMBOLS, range(len(PAIR_NAMES))))
+        self._spot_symbols = list(SPOT_SYMBOLS)
+        self._futures_symbols = list(PERP_SYMBOLS)
+        self._pair_index = {pair_name: i for pair_name, _, _, i in self._pairs}
+        
+        # Recent settled funding rates per pair (oldest first), loaded once and
+        # then extended in memory as new funding epochs are observed
+        self.funding_history: Dict[str, deque] = self._load_funding_history()
+        # The same rates as one (pairs x depth) matrix, NaN-padded on the left,
+        # so funding volatility for every pair is a single vectorized reduction
+        self._funding_matrix = np.full((len(PAIR_NAMES), FUNDING_HISTORY_DEPTH), np.nan)
+        for pair_name, rates in self.funding_history.items():
+            if rates:
+                self._funding_matrix[self._pair_index[pair_name], -len(rates):] = list(rates)
+        # pair -> (funding timestamp of the current epoch, latest rate seen for it)
+        self._funding_epochs: Dict[str, Tuple[int, float]] = {}
         
     async def start_scanning(self):
         """Start the live opportunity scanning process."""
         logger.info("🔍 Starting live funding rate arbitrage scanner...")
-        logger.info(f"📊 Monitoring pairs: {list(TRADING_PAIRS.keys())}")
+        logger.info(f"📊 Monitoring pairs: {list(PAIR_NAMES)}")
         logger.info(f"⚙️  Scan interval: {self.config['scan_interval']} seconds")
         
-        while True:
-            try:
-                opportunities = await self.scan_opportunities()
-                await self.process_opportunities(opportunities)
-                await asyncio.sleep(self.config['scan_interval'])
-                
-            except KeyboardInterrupt:
-                logger.info("🛑 Scanner stopped by user")
-                break
-            except Exception as e:
-                logger.error(f"❌ Error in scanning loop: {e}")
-                await asyncio.sleep(60)  # Wait longer on error
+        try:
+            while True:
+                try:
+                    # Sleep only for what is left of the interval so slow scans don't make cycles drift
+                    cycle_start = time.monotonic()
+                    opportunities = await self.scan_opportunities()
+                    await self.process_opportunities(opportunities)
+                    elapsed = time.monotonic() - cycle_start
+                    await asyncio.sleep(max(0.0, self.config['scan_interval'] - elapsed))
+                    
+                except KeyboardInterrupt:
+                    logger.info("🛑 Scanner stopped by user")
+                    break
+                except Exception as e:
+                    logger.error(f"❌ Error in scanning loop: {e}")
+                    await asyncio.sleep(60)  # Wait longer on error
+        finally:
+            await self.close()
+    
+    async def _get_exchange(self):
+        """Return the shared exchange client, creating it and loading markets on first use."""
+        if self.exchange is None:
+            self.exchange = await get_exchange()
+        return self.exchange
+    
+    async def close(self):
+        """Close the shared exchange clients and their HTTP session."""
+        if self.exchange is not None:
+            self.exchange = None
+            await close_exchanges()
     
     async def scan_opportunities(self) -> List[ArbitrageOpportunity]:
         """Scan for current arbitrage opportunities."""
         opportunities = []
+        self._passes_market_thresholds, self._passes_risk_threshold = _make_threshold_checks(self.config)
         
-        async with ccxt.bybit(self.exchange_config) as exchange:
-            await exchange.load_markets()
-            
-            for pair_name, pair_info in TRADING_PAIRS.items():
-                try:
-                    opportunity = await self._analyze_pair(exchange, pair_name, pair_info)
-                    if opportunity:
-                        opportunities.append(opportunity)
-                        
-                except Exception as e:
-                    logger.error(f"Error analyzing {pair_name}: {e}")
-                    continue
+        exchange = await self._get_exchange()
+        
+        # One batched request per market type covers every pair
+        spot_tickers, futures_tickers, funding_rates = await asyncio.gather(
+            self._fetch_tickers(exchange, self._spot_symbols, 'spot'),
+            self._fetch_tickers(exchange, self._futures_symbols, 'swap'),
+            self._fetch_funding_rates(exchange, self._futures_symbols),
+        )
+        
+        for pair_name, _, futures_symbol, _ in self._pairs:
+            funding_rate_info = funding_rates.get(futures_symbol)
+            if funding_rate_info:
+                self._record_funding_rate(pair_name, funding_rate_info)
+        funding_stds = self._funding_volatility()
+        
+        # Pairs are independent, so analyze them concurrently
+        results = await asyncio.gather(
+            *(self._analyze_pair(exchange, pair_name, spot_symbol, futures_symbol,
+                                 spot_tickers, futures_tickers, funding_rates,
+                                 funding_stds[pair_index])
+              for pair_name, spot_symbol, futures_symbol, pair_index in self._pairs),
+            return_exceptions=True
+        )
+        
+        for (pair_name, _, _, _), result in zip(self._pairs, results):
+            if isinstance(result, Exception):
+                logger.error(f"Error analyzing {pair_name}: {result}")
+            elif result:
+                opportunities.append(result)
         
         return opportunities
     
-    async def _analyze_pair(self, exchange, pair_name: str, pair_info: dict) -> Optional[ArbitrageOpportunity]:
+    async def _fetch_tickers(self, exchange, symbols: List[str], market_type: str) -> Dict[str, dict]:
+        """Fetch tickers for all symbols of one market type, batched when the exchange supports it."""
+        params = {'type': market_type}
+        if exchange.has.get('fetchTickers'):
+            return await throttled(exchange.fetch_tickers, symbols, params=params)
+        
+        tickers = await asyncio.gather(*(throttled(exchange.fetch_ticker, symbol, params=params) for symbol in symbols))
+        return dict(zip(symbols, tickers))
+    
+    async def _fetch_funding_rates(self, exchange, symbols: List[str]) -> Dict[str, dict]:
+        """Return current funding rates, refetching only symbols whose cached entry is stale."""
+        now = time.monotonic()
+        now_ms = time.time() * 1000
+        rates = {}
+        stale_symbols = []
+        
+        for symbol in symbols:
+            cached = self._funding_rate_cache.get(symbol)
+            # An entry also expires once its funding time has passed, so the
+            # new epoch's rate is picked up immediately
+            if (cached and now - cached[0] < self.config['funding_rate_cache_ttl']
+                    and (cached[1].get('fundingTimestamp') or now_ms) >= now_ms):
+                rates[symbol] = cached[1]
+            else:
+                stale_symbols.append(symbol)
+        
+        if stale_symbols:
+            fetched = await self._request_funding_rates(exchange, stale_symbols)
+            for symbol, funding_rate_info in fetched.items():
+                self._funding_rate_cache[symbol] = (now, funding_rate_info)
+            rates.update(fetched)
+        
+        return rates
+    
+    async def _request_funding_rates(self, exchange, symbols: List[str]) -> Dict[str, dict]:
+        """Fetch current funding rates for perpetual symbols, batched when the exchange supports it."""
+        if exchange.has.get('fetchFundingRates'):
+            return await throttled(exchange.fetch_funding_rates, symbols)
+        
+        rates = await asyncio.gather(*(throttled(exchange.fetch_funding_rate, symbol) for symbol in symbols))
+        return dict(zip(symbols, rates))
+    
+    async def _analyze_pair(
+        self,
+        exchange,
+        pair_name: str,
+        spot_symbol: str,
+        futures_symbol: str,
+        spot_tickers: Dict[str, dict],
+        futures_tickers: Dict[str, dict],
+        funding_rates: Dict[str, dict],
+        funding_std: float
+    ) -> Optional[ArbitrageOpportunity]:
         """Analyze a specific trading pair for arbitrage opportunities."""
         try:
             # Get current market data
-            spot_symbol = pair_info['spot']
-            futures_symbol = pair_info['perpetual']
+            spot_ticker = spot_tickers[spot_symbol]
+            futures_ticker = futures_tickers[futures_symbol]
+            funding_rate_info = funding_rates[futures_symbol]
             
-            # Fetch spot data
-            exchange.options['defaultType'] = 'spot'
-            spot_ticker = await exchange.fetch_ticker(spot_symbol)
-            spot_orderbook = await exchange.fetch_order_book(spot_symbol, limit=5)
-            
-            # Fetch futures data
-            exchange.options['defaultType'] = 'future'
-            futures_ticker = await exchange.fetch_ticker(futures_symbol)
-            futures_orderbook = await exchange.fetch_order_book(futures_symbol, limit=5)
-            funding_rate_info = await exchange.fetch_funding_rate(futures_symbol)
+            # Order books have no batch endpoint; fetch both sides in parallel.
+            # The unified symbol (BTC/USDT vs BTC/USDT:USDT) selects the market
+            spot_orderbook, futures_orderbook = await asyncio.gather(
+                throttled(exchange.fetch_order_book, spot_symbol, limit=5),
+                throttled(exchange.fetch_order_book, futures_symbol, limit=5),
+            )
             
             # Debug: Log the raw data to understand structure
-            logger.debug(f"Funding rate info for {pair_name}: {funding_rate_info}")
+            if logger.isEnabledFor(logging.DEBUG):
+                logger.debug("Funding rate info for %s: %s", pair_name, funding_rate_info)
             
-            # Calculate metrics with error handling
-            spot_price = float(spot_ticker['last'])
-            futures_price = float(futures_ticker['last'])
-            funding_rate = float(funding_rate_info['fundingRate'])
+            # Calculate metrics with error handling (ccxt already parses these
+            # to floats; a missing value raises TypeError below and skips the pair)
+            spot_price = spot_ticker['last']
+            futures_price = futures_ticker['last']
+            funding_rate = funding_rate_info['fundingRate']
             
-            # Handle funding datetime (might be string or timestamp)
+            # Next funding time, always normalized to timezone-aware UTC. ccxt's
+            # integer fundingTimestamp is preferred; fundingDatetime (might be
+            # string or timestamp) is only parsed when it is missing
+            funding_timestamp = funding_rate_info.get('fundingTimestamp')
             funding_datetime = funding_rate_info.get('fundingDatetime')
-            if funding_datetime is None:
+            if funding_timestamp is not None:
+                next_funding = datetime.fromtimestamp(funding_timestamp / 1000, tz=timezone.utc)
+            elif funding_datetime is None:
                 # Use current time + 8 hours as fallback
-                next_funding = datetime.utcnow() + timedelta(hours=8)
+                next_funding = datetime.now(timezone.utc) + timedelta(hours=8)
             elif isinstance(funding_datetime, str):
                 # Parse ISO string
-                from datetime import datetime as dt
                 try:
-                    next_funding = dt.fromisoformat(funding_datetime.replace('Z', '+00:00'))
+                    next_funding = datetime.fromisoformat(funding_datetime.replace('Z', '+00:00'))
+                    if next_funding.tzinfo is None:
+                        next_funding = next_funding.replace(tzinfo=timezone.utc)
                 except ValueError:
                     # Fallback for different string formats
-                    next_funding = datetime.utcnow() + timedelta(hours=8)
+                    next_funding = datetime.now(timezone.utc) + timedelta(hours=8)
             else:
                 # Convert timestamp
-                next_funding = datetime.fromtimestamp(int(funding_datetime) / 1000)
+                next_funding = datetime.fromtimestamp(int(funding_datetime) / 1000, tz=timezone.utc)
             
             # Calculate basis (futures premium/discount)
             basis = futures_price - spot_price
             basis_bps = (basis / spot_price) * 10000  # Convert to basis points
             
             # Calculate annualized funding rate
-            annual_funding_rate = funding_rate * 365 * 3 * 100  # 3 times daily, to percentage
+            annual_funding_rate = funding_rate * ANNUAL_FUNDING_PCT_MULT  # 3 times daily, to percentage
             
             # Calculate bid-ask spreads
             spot_spread = ((spot_orderbook['asks'][0][0] - spot_orderbook['bids'][0][0]) / spot_price) * 10000
@@ -196,7 +366,8 @@ class OpportunityScanner:
             # Determine if this is an opportunity
             opportunity = self._evaluate_opportunity(
                 pair_name, spot_price, futures_price, funding_rate, next_funding,
-                basis_bps, annual_funding_rate, volume_24h, avg_spread, funding_history
+                basis_bps, annual_funding_rate, volume_24h, avg_spread, funding_history,
+                funding_std
             )
             
             return opportunity
@@ -216,18 +387,13 @@ class OpportunityScanner:
         annual_funding_rate: float,
         volume_24h: float,
         avg_spread: float,
-        funding_history: List[float]
+        funding_history: Tuple[float, ...],
+        funding_std: float
     ) -> Optional[ArbitrageOpportunity]:
         """Evaluate whether current market conditions present an arbitrage opportunity."""
         
         # Check minimum thresholds
-        if abs(funding_rate) < self.config['min_funding_rate']:
-            return None
-            
-        if volume_24h < self.config['min_volume_24h']:
-            return None
-            
-        if avg_spread > self.config['max_spread_bps']:
+        if not self._passes_market_thresholds(funding_rate, volume_24h, avg_spread):
             return None
         
         # Determine opportunity type and action
@@ -246,10 +412,10 @@ class OpportunityScanner:
         
         # Calculate risk score (1-10, lower is better)
         risk_score = self._calculate_risk_score(
-            funding_rate, basis_bps, avg_spread, volume_24h, funding_history
+            funding_rate, basis_bps, avg_spread, volume_24h, funding_std
         )
         
-        if risk_score > self.config['max_risk_score']:
+        if not self._passes_risk_threshold(risk_score):
             return None
         
         # Determine entry confidence
@@ -280,35 +446,35 @@ class OpportunityScanner:
             timestamp=datetime.utcnow()
         )
     
+    @staticmethod
     def _calculate_risk_score(
-        self, 
         funding_rate: float, 
         basis_bps: float, 
         spread: float, 
         volume: float,
-        funding_history: List[float]
+        funding_std: float
     ) -> float:
         """Calculate risk score for the opportunity (1-10, lower is better)."""
         risk_score = 1.0
+        abs_funding_rate = abs(funding_rate)
+        abs_basis_bps = abs(basis_bps)
         
         # Funding rate volatility risk
-        if funding_history:
-            funding_std = np.std(funding_history) if len(funding_history) > 1 else 0
-            if funding_std > 0.0005:  # High volatility
-                risk_score += 2
-            elif funding_std > 0.0002:
-                risk_score += 1
+        if funding_std > 0.0005:  # High volatility
+            risk_score += 2
+        elif funding_std > 0.0002:
+            risk_score += 1
         
         # Extreme funding rate risk
-        if abs(funding_rate) > 0.002:  # Very high funding rate
+        if abs_funding_rate > 0.002:  # Very high funding rate
             risk_score += 2
-        elif abs(funding_rate) > 0.001:
+        elif abs_funding_rate > 0.001:
             risk_score += 1
         
         # Basis risk (mean reversion)
-        if abs(basis_bps) > 50:  # Large basis
+        if abs_basis_bps > 50:  # Large basis
             risk_score += 1.5
-        elif abs(basis_bps) > 20:
+        elif abs_basis_bps > 20:
             risk_score += 0.5
         
         # Liquidity risk
@@ -330,7 +496,7 @@ class OpportunityScanner:
         abs_funding_rate: float, 
         abs_basis_bps: float, 
         risk_score: float,
-        funding_history: List[float]
+        funding_history: Tuple[float, ...]
     ) -> str:
         """Determine confidence level for the opportunity."""
         score = 0
@@ -373,23 +539,50 @@ class OpportunityScanner:
         
         return base_min * spread_multiplier
     
-    async def _get_funding_history(self, symbol: str) -> List[float]:
-        """Get recent funding rate history from database."""
-        session = self.Session()
+    def _load_funding_history(self, depth: int = FUNDING_HISTORY_DEPTH) -> Dict[str, deque]:
+        """Load the most recent funding rates for every pair with a single query."""
+        history = {pair_name: deque(maxlen=depth) for pair_name in PAIR_NAMES}
         try:
-            recent_rates = session.query(FundingRate.funding_rate)\
-                .filter_by(symbol=symbol)\
-                .order_by(FundingRate.timestamp.desc())\
-                .limit(10)\
-                .all()
-            
-            return [rate[0] for rate in recent_rates if rate[0] is not None]
+            with self.engine.connect() as connection:
+                rows = connection.execute(
+                    FUNDING_HISTORY_SQL, {'symbols': list(PAIR_NAMES), 'depth': depth}
+                )
+                for symbol, funding_rate in rows:
+                    history[symbol].append(funding_rate)
         
         except Exception as e:
-            logger.error(f"Error getting funding history for {symbol}: {e}")
-            return []
-        finally:
-            session.close()
+            logger.error(f"Error loading funding history: {e}")
+        
+        return history
+    
+    def _record_funding_rate(self, symbol: str, funding_rate_info: dict):
+        """Track the live rate and append it to the history once its funding epoch settles."""
+        funding_timestamp = funding_rate_info.get('fundingTimestamp')
+        funding_rate = funding_rate_info.get('fundingRate')
+        if funding_timestamp is None or funding_rate is None:
+            return
+        
+        previous = self._funding_epochs.get(symbol)
+        if previous and funding_timestamp > previous[0]:
+            # The funding time moved forward, so the last rate seen for the
+            # previous epoch is the one that was charged
+            self.funding_history[symbol].append(previous[1])
+            row = self._funding_matrix[self._pair_index[symbol]]
+            row[:-1] = row[1:]
+            row[-1] = previous[1]
+        self._funding_epochs[symbol] = (funding_timestamp, float(funding_rate))
+    
+    def _funding_volatility(self) -> np.ndarray:
+        """Population std of each pair's funding history (0 when empty), indexed by _pair_index."""
+        filled = ~np.isnan(self._funding_matrix)
+        counts = np.maximum(filled.sum(axis=1), 1)
+        means = np.where(filled, self._funding_matrix, 0.0).sum(axis=1) / counts
+        deviations = np.where(filled, self._funding_matrix - means[:, None], 0.0)
+        return np.sqrt((deviations ** 2).sum(axis=1) / counts)
+    
+    async def _get_funding_history(self, symbol: str) -> Tuple[float, ...]:
+        """Get recent funding rate history from the in-memory buffer."""
+        return tuple(self.funding_history.get(symbol, ()))
     
     async def process_opportunities(self, opportunities: List[ArbitrageOpportunity]):
         """Process and display found opportunities."""
@@ -400,30 +593,22 @@ class OpportunityScanner:
         # Sort by profit potential
         opportunities.sort(key=lambda x: x.profit_potential, reverse=True)
         
-        logger.info(f"\n🎯 FOUND {len(opportunities)} ARBITRAGE OPPORTUNITIES")
-        logger.info("=" * 80)
-        
+        # Build the whole report and emit it as one log record
+        lines = [f"\n🎯 FOUND {len(opportunities)} ARBITRAGE OPPORTUNITIES", "=" * 80]
+        now_utc = datetime.now(timezone.utc)
         for i, opp in enumerate(opportunities, 1):
-            await self._display_opportunity(i, opp)
+            lines.extend(self._format_opportunity(i, opp, now_utc))
+        logger.info("\n".join(lines))
             
-        # Store opportunities for trend analysis
+        # Store opportunities for trend analysis; the deque drops the oldest past 100
         self.recent_opportunities.extend(opportunities)
-        # Keep only last 100 opportunities
-        self.recent_opportunities = self.recent_opportunities[-100:]
         
         # Save to database
         await self._save_opportunities(opportunities)
     
-    async def _display_opportunity(self, rank: int, opp: ArbitrageOpportunity):
-        """Display a formatted opportunity."""
-        # Handle timezone-aware datetime
-        now = datetime.utcnow()
-        if opp.next_funding_time.tzinfo is not None:
-            # Convert to UTC if timezone-aware
-            from datetime import timezone
-            now = now.replace(tzinfo=timezone.utc)
-        
-        time_to_funding = opp.next_funding_time - now
+    def _format_opportunity(self, rank: int, opp: ArbitrageOpportunity, now_utc: datetime) -> List[str]:
+        """Format an opportunity as report lines."""
+        time_to_funding = opp.next_funding_time - now_utc
         hours_to_funding = time_to_funding.total_seconds() / 3600
         
         # Format colors for terminal output
@@ -433,21 +618,22 @@ class OpportunityScanner:
             'LOW': '🔴'
         }
         
-        logger.info(f"\n{rank}. {confidence_color.get(opp.entry_confidence, '⚪')} {opp.symbol} - {opp.opportunity_type.upper()}")
-        logger.info(f"   💰 Profit Potential: {opp.profit_potential:+.2f}% annually")
-        logger.info(f"   📈 Funding Rate: {opp.funding_rate:.6f} ({opp.annual_funding_rate:+.2f}% annual)")
-        logger.info(f"   💲 Spot: ${opp.spot_price:,.2f} | Futures: ${opp.futures_price:,.2f}")
-        logger.info(f"   📊 Basis: {opp.basis_bps:+.1f} bps | Spread: {opp.bid_ask_spread:.1f} bps")
-        logger.info(f"   🎯 Action: {opp.recommended_action}")
-        logger.info(f"   ⚠️  Risk Score: {opp.risk_score:.1f}/10 | Confidence: {opp.entry_confidence}")
-        logger.info(f"   💵 Min Capital: ${opp.min_capital:,.0f}")
-        logger.info(f"   📅 Next Funding: {hours_to_funding:.1f}h")
-        logger.info(f"   📈 24h Volume: ${opp.volume_24h:,.0f}")
+        return [
+            f"\n{rank}. {confidence_color.get(opp.entry_confidence, '⚪')} {opp.symbol} - {opp.opportunity_type.upper()}",
+            f"   💰 Profit Potential: {opp.profit_potential:+.2f}% annually",
+            f"   📈 Funding Rate: {opp.funding_rate:.6f} ({opp.annual_funding_rate:+.2f}% annual)",
+            f"   💲 Spot: ${opp.spot_price:,.2f} | Futures: ${opp.futures_price:,.2f}",
+            f"   📊 Basis: {opp.basis_bps:+.1f} bps | Spread: {opp.bid_ask_spread:.1f} bps",
+            f"   🎯 Action: {opp.recommended_action}",
+            f"   ⚠️  Risk Score: {opp.risk_score:.1f}/10 | Confidence: {opp.entry_confidence}",
+            f"   💵 Min Capital: ${opp.min_capital:,.0f}",
+            f"   📅 Next Funding: {hours_to_funding:.1f}h",
+            f"   📈 24h Volume: ${opp.volume_24h:,.0f}",
+        ]
     
     async def _save_opportunities(self, opportunities: List[ArbitrageOpportunity]):
         """Save opportunities to database for historical analysis."""
         # This could be expanded to save opportunities to a dedicated table
-        session = self.Session()
         try:
             # For now, we'll log to file
             opportunities_data = []
@@ -463,33 +649,18 @@ class OpportunityScanner:
                     'action': opp.recommended_action
                 })
             
-            # Save to JSON log file
-            with open('logs/opportunities.json', 'a') as f:
-                for opp_data in opportunities_data:
-                    f.write(json.dumps(opp_data) + '\n')
+            # Serialize and write in a worker thread so the event loop keeps serving requests
+            await asyncio.to_thread(self._append_opportunities_log, opportunities_data)
                     
         except Exception as e:
             logger.error(f"Error saving opportunities: {e}")
-        finally:
-            session.close()
-
-# Import numpy for calculations
-try:
-    import numpy as np
-except ImportError:
-    logger.warning("NumPy not available, using basic calculations")
-    # Simple fallback for standard deviation
-    def np_std(values):
-        if len(values) <= 1:
-            return 0
-        mean = sum(values) / len(values)
-        variance = sum((x - mean) ** 2 for x in values) / len(values)
-        return variance ** 0.5
     
-    class np:
-        @staticmethod
-        def std(values):
-            return np_std(values)
+    @staticmethod
+    def _append_opportunities_log(opportunities_data: List[dict]):
+        """Append a scan's opportunities to the JSON log file in a single write."""
+        payload = ''.join(json.dumps(opp_data) + '\n' for opp_data in opportunities_data)
+        with open(LOGS_DIR / 'opportunities.json', 'a') as f:
+            f.write(payload)
 
 async def main():
     """Main function to run the opportunity scanner."""
@@ -497,4 +668,5 @@ async def main():
     await scanner.start_scanning()
 
 if __name__ == '__main__':
-    asyncio.run(main())
+    setup_logging()
+    event_loop.run(main())
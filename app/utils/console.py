@@ -0,0 +1,63 @@
+"""
+User-facing output of the command-line scripts, routed through logging.
+"""
+
+import logging
+import os
+import sys
+from logging.handlers import RotatingFileHandler
+
+from app.utils.log_queue import start_queue_listener
+from config.settings import LOGGING, ensure_dirs
+
+# Parent of every script's console logger
+CONSOLE_LOGGER = 'console'
+
+
+class _LogFileHandler(RotatingFileHandler):
+    """Rotating log file that creates logs/ and opens the file on the first record."""
+
+    def __init__(self, *args, **kwargs):
+        super().__init__(*args, delay=True, **kwargs)
+
+    def _open(self):
+        ensure_dirs()
+        return super()._open()
+
+
+def get_console_logger(name):
+    """
+    Return a logger for a script's console output.
+
+    Records are written to stdout as bare messages, like print(), and appended
+    with the LOGGING format to LOGGING['file']. The level is LOGGING['level']
+    unless the LOG_LEVEL environment variable overrides it. Records do not
+    propagate, so handlers the app modules attach to the root logger never
+    print them twice.
+
+    The stdout and file writes happen on a listener thread (see
+    start_queue_listener).
+
+    Args:
+        name (str): Usually the script's __name__
+    """
+    parent = logging.getLogger(CONSOLE_LOGGER)
+
+    if not parent.handlers:
+        console_handler = logging.StreamHandler(sys.stdout)
+        console_handler.setFormatter(logging.Formatter('%(message)s'))
+
+        # Importing a script, or running it with --help, leaves the disk alone
+        file_handler = _LogFileHandler(
+            LOGGING['file'],
+            maxBytes=LOGGING['max_size'],
+            backupCount=LOGGING['backup_count'],
+            encoding='utf-8',
+        )
+        file_handler.setFormatter(logging.Formatter(LOGGING['format']))
+
+        parent.addHandler(start_queue_listener([console_handler, file_handler]))
+        parent.setLevel(os.getenv('LOG_LEVEL', LOGGING['level']).upper())
+        parent.propagate = False
+
+    return parent.getChild(name)
@@ -0,0 +1,22 @@
+"""
+Event loop selection for the command-line entry points.
+"""
+
+import asyncio
+
+try:
+    import uvloop
+except ImportError:  # uvloop is optional (and unavailable on Windows)
+    uvloop = None
+
+
+def run(coro):
+    """
+    Run a coroutine to completion, like asyncio.run().
+
+    Uses uvloop's faster socket I/O for the ccxt/aiohttp traffic when it is
+    installed and the default asyncio loop otherwise.
+    """
+    loop_factory = uvloop.new_event_loop if uvloop is not None else None
+    with asyncio.Runner(loop_factory=loop_factory) as runner:
+        return runner.run(coro)
@@ -0,0 +1,235 @@
+"""
+Helpers shared by modules that talk to the exchange through ccxt.
+"""
+
+import asyncio
+import json
+import logging
+import os
+import random
+import ssl
+import time
+
+import aiohttp
+import certifi
+import ccxt.async_support as ccxt
+
+from config.settings import API_CONFIG, DATA_COLLECTION, DATA_DIR, ensure_dirs, get_api_credentials
+
+logger = logging.getLogger(__name__)
+
+# Process-wide clients handed out by get_exchange(), keyed by market type
+_exchanges = {}
+_http_session = None
+_exchange_lock = None
+_burst_limiter = None
+
+
+class BurstLimiter:
+    """
+    Allow up to `rate` requests to start in any `per`-second window.
+    
+    ccxt's own limiter (enableRateLimit) spaces every request out, which
+    serializes calls issued together with asyncio.gather(); here a burst
+    starts at once as long as the window has room.
+    """
+    
+    def __init__(self, rate, per):
+        self._semaphore = asyncio.Semaphore(rate)
+        self._per = per
+    
+    async def __aenter__(self):
+        await self._semaphore.acquire()
+        # The slot frees up one window after the request started
+        asyncio.get_running_loop().call_later(self._per, self._semaphore.release)
+        return self
+    
+    async def __aexit__(self, exc_type, exc, tb):
+        return False
+
+
+def create_http_session():
+    """
+    Create a keep-alive HTTP session that several ccxt clients can share.
+    
+    Pass it as the 'session' config entry; ccxt then reuses its pooled
+    connections instead of opening its own, and leaves closing it to the caller.
+    """
+    connector = aiohttp.TCPConnector(
+        ssl=ssl.create_default_context(cafile=certifi.where()),
+        limit=API_CONFIG['http_connection_limit'],
+        limit_per_host=API_CONFIG['http_connection_limit_per_host'],
+        keepalive_timeout=API_CONFIG['http_keepalive_timeout'],
+        ttl_dns_cache=300,
+        enable_cleanup_closed=True,
+    )
+    return aiohttp.ClientSession(connector=connector, trust_env=True)
+
+
+def _markets_cache_path(exchange):
+    return DATA_DIR / f"{exchange.id}_markets.json"
+
+
+async def load_markets_cached(exchange):
+    """
+    Load exchange markets, reusing an on-disk copy while it is fresh.
+    
+    load_markets() is one of the heaviest public calls ccxt makes, so the
+    result is persisted and injected with set_markets() on later runs until
+    API_CONFIG['markets_cache_ttl'] expires.
+    
+    Args:
+        exchange: ccxt async exchange instance
+    
+    Returns:
+        dict: Markets keyed by unified symbol
+    """
+    cache_path = _markets_cache_path(exchange)
+    
+    if cache_path.exists() and time.time() - cache_path.stat().st_mtime < API_CONFIG['markets_cache_ttl']:
+        try:
+            with open(cache_path) as f:
+                cached = json.load(f)
+            exchange.set_markets(cached['markets'], cached.get('currencies'))
+            return exchange.markets
+        except (OSError, ValueError, KeyError) as e:
+            logger.warning(f"Ignoring unreadable markets cache {cache_path}: {e}")
+    
+    markets = await exchange.load_markets()
+    
+    try:
+        ensure_dirs()
+        # Write then rename so concurrent readers never see a partial file
+        tmp_path = cache_path.with_suffix('.tmp')
+        with open(tmp_path, 'w') as f:
+            json.dump({'markets': markets, 'currencies': exchange.currencies}, f)
+        os.replace(tmp_path, cache_path)
+    except (OSError, TypeError, ValueError) as e:
+        logger.warning(f"Could not write markets cache {cache_path}: {e}")
+    
+    return markets
+
+
+async def get_exchange(default_type='spot'):
+    """
+    Return the process-wide Bybit client for one market type.
+    
+    Clients are created on first use with markets loaded, share one keep-alive
+    HTTP session and the same markets, and stay open until close_exchanges().
+    Their built-in rate limiter is off; wrap calls in throttled().
+    
+    Args:
+        default_type (str): ccxt defaultType option, e.g. 'spot' or 'future'
+    """
+    global _http_session, _exchange_lock
+    
+    if _exchange_lock is None:
+        _exchange_lock = asyncio.Lock()
+    
+    async with _exchange_lock:
+        if default_type not in _exchanges:
+            if _http_session is None or _http_session.closed:
+                _http_session = create_http_session()
+            
+            credentials = get_api_credentials()
+            exchange = ccxt.bybit({
+                'apiKey': credentials['apiKey'],
+                'secret': credentials['secret'],
+                'testnet': credentials['testnet'],
+                # Requests are paced by throttled() instead
+                'enableRateLimit': False,
+                'options': {'defaultType': default_type},
+                'session': _http_session,
+            })
+            
+            loaded = next((other for other in _exchanges.values() if other.markets), None)
+            if loaded:
+                exchange.set_markets(loaded.markets, loaded.currencies)
+            else:
+                try:
+                    await load_markets_cached(exchange)
+                except Exception:
+                    await exchange.close()
+                    raise
+            _exchanges[default_type] = exchange
+        
+        return _exchanges[default_type]
+
+
+async def throttled(method, *args, **kwargs):
+    """
+    Await a ccxt method under the burst limit shared by get_exchange() clients.
+    
+    Args:
+        method: Bound ccxt coroutine method, e.g. exchange.fetch_tickers
+    """
+    global _burst_limiter
+    
+    if _burst_limiter is None:
+        _burst_limiter = BurstLimiter(API_CONFIG['burst_requests'], API_CONFIG['burst_window'])
+    
+    async with _burst_limiter:
+        return await method(*args, **kwargs)
+
+
+async def close_exchanges():
+    """Close every client from get_exchange() and their shared HTTP session."""
+    global _http_session, _exchange_lock, _burst_limiter
+    
+    exchanges = list(_exchanges.values())
+    _exchanges.clear()
+    for exchange in exchanges:
+        await exchange.close()
+    
+    if _http_session is not None:
+        await _http_session.close()
+        _http_session = None
+    # A fresh lock and limiter for the next event loop
+    _exchange_lock = None
+    _burst_limiter = None
+
+
+def _rate_limit_reset_delay(exchange):
+    """Seconds until Bybit's rate-limit window resets, if the last response said so."""
+    headers = getattr(exchange, 'last_response_headers', None) or {}
+    reset_ms = headers.get('X-Bapi-Limit-Reset-Timestamp')
+    if not reset_ms:
+        return None
+    try:
+        return max(0.0, int(reset_ms) / 1000 - time.time())
+    except (TypeError, ValueError):
+        return None
+
+
+async def call_with_retry(method, *args, **kwargs):
+    """
+    Await a ccxt method, retrying transient network failures.
+    
+    Retries use exponential backoff with jitter, starting at
+    DATA_COLLECTION['retry_delay'] and capped at 'retry_max_delay'. When the
+    exchange reports a rate-limit reset time, that is waited for instead.
+    Non-network errors (bad symbol, auth, ...) are raised immediately, as is
+    the last error once 'max_retries' is exhausted.
+    
+    Args:
+        method: Bound ccxt coroutine method, e.g. exchange.fetch_ohlcv
+    """
+    max_retries = DATA_COLLECTION['max_retries']
+    
+    for attempt in range(max_retries + 1):
+        try:
+            return await method(*args, **kwargs)
+        except ccxt.NetworkError as e:
+            if attempt == max_retries:
+                raise
+            
+            delay = min(DATA_COLLECTION['retry_max_delay'], DATA_COLLECTION['retry_delay'] * 2 ** attempt)
+            if isinstance(e, ccxt.RateLimitExceeded):
+                reset_delay = _rate_limit_reset_delay(method.__self__)
+                if reset_delay is not None:
+                    delay = min(DATA_COLLECTION['retry_max_delay'], reset_delay)
+            delay += random.uniform(0, delay / 2)
+            
+            logger.warning(f"{type(e).__name__} on {method.__name__}, retrying in {delay:.1f}s "
+                           f"({attempt + 1}/{max_retries})")
+            await asyncio.sleep(delay)
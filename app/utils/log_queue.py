@@ -0,0 +1,29 @@
+"""
+Background-thread log writing shared by the console and scanner loggers.
+"""
+
+import atexit
+import queue
+from logging.handlers import QueueHandler, QueueListener
+
+
+def start_queue_listener(handlers):
+    """
+    Start a listener thread that writes records through the given handlers.
+
+    Attach the returned QueueHandler to a logger: logging calls on it then
+    only enqueue the record, so stream and file writes stay off the event
+    loop. The listener is stopped, flushing what is still queued, at
+    interpreter exit.
+
+    Args:
+        handlers (list): Handlers the listener thread emits each record to
+
+    Returns:
+        QueueHandler: Handler that feeds the listener
+    """
+    records = queue.SimpleQueue()
+    listener = QueueListener(records, *handlers)
+    listener.start()
+    atexit.register(listener.stop)
+    return QueueHandler(records)
@@ -3,17 +3,50 @@
 Script to check what historical data we have in the database.
 """
 
-import sys
 import os
 from datetime import datetime
-from sqlalchemy import create_engine, text
+from sqlalchemy import create_engine, func, select, text
 from sqlalchemy.orm import sessionmaker
 
-# Add project root to path
-sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
-
 from app.models.funding_rate_models import Base, PerpetualOHLCV, SpotOHLCV, FundingRate
-from config.settings import DATABASE_PATH
+from config.settings import ANNUAL_FUNDING_PCT_MULT, DATABASE_PATH
+
+# Tables summarized per trading pair, with their display labels
+PAIR_SUMMARY_TABLES = {
+    SpotOHLCV: '📈 Spot OHLCV',
+    PerpetualOHLCV: '🔮 Perpetual OHLCV',
+    FundingRate: '💸 Funding Rates',
+}
+
+def _symbol_summary(session, model):
+    """Return {symbol: (count, earliest, latest)} for one table in a single query."""
+    rows = session.execute(
+        select(model.symbol, func.count(), func.min(model.timestamp), func.max(model.timestamp))
+        .group_by(model.symbol)
+    )
+    return {symbol: (count, earliest, latest) for symbol, count, earliest, latest in rows}
+
+def _recent_funding_rates(session, limit=3):
+    """Return {symbol: [(timestamp, funding_rate), ...]} with the latest rates first."""
+    ranked = select(
+        FundingRate.symbol,
+        FundingRate.timestamp,
+        FundingRate.funding_rate,
+        func.row_number().over(
+            partition_by=FundingRate.symbol,
+            order_by=FundingRate.timestamp.desc()
+        ).label('recency')
+    ).subquery()
+    rows = session.execute(
+        select(ranked.c.symbol, ranked.c.timestamp, ranked.c.funding_rate)
+        .where(ranked.c.recency <= limit)
+        .order_by(ranked.c.symbol, ranked.c.timestamp.desc())
+    )
+    
+    recent = {}
+    for symbol, timestamp, funding_rate in rows:
+        recent.setdefault(symbol, []).append((timestamp, funding_rate))
+    return recent
 
 def check_database():
     """Check what data we have in the database."""
@@ -41,6 +74,18 @@ def check_database():
         print("📊 DETAILED BREAKDOWN BY TRADING PAIR")
         print("="*60)
         
+        # One GROUP BY per table instead of three queries per pair and table
+        summaries = {}
+        for model in PAIR_SUMMARY_TABLES:
+            try:
+                summaries[model] = _symbol_summary(session, model)
+            except Exception as e:
+                summaries[model] = e
+        try:
+            recent_funding = _recent_funding_rates(session)
+        except Exception:
+            recent_funding = {}
+        
         # Check each trading pair
         pairs = ['BTC/USDT', 'ETH/USDT', 'SOL/USDT']
         
@@ -48,55 +93,27 @@ def check_database():
             print(f"\n💰 {pair}:")
             print("-" * 40)
             
-            # Spot data
-            try:
-                spot_count = session.query(SpotOHLCV).filter_by(symbol=pair).count()
-                if spot_count > 0:
-                    earliest_spot = session.query(SpotOHLCV.timestamp).filter_by(symbol=pair).order_by(SpotOHLCV.timestamp.asc()).first()
-                    latest_spot = session.query(SpotOHLCV.timestamp).filter_by(symbol=pair).order_by(SpotOHLCV.timestamp.desc()).first()
-                    print(f"  📈 Spot OHLCV: {spot_count:,} records")
-                    print(f"     From: {earliest_spot[0].strftime('%Y-%m-%d %H:%M:%S')}")
-                    print(f"     To:   {latest_spot[0].strftime('%Y-%m-%d %H:%M:%S')}")
-                else:
-                    print(f"  📈 Spot OHLCV: No data")
-            except Exception as e:
-                print(f"  📈 Spot OHLCV: Error - {e}")
-            
-            # Perpetual data
-            try:
-                perp_count = session.query(PerpetualOHLCV).filter_by(symbol=pair).count()
-                if perp_count > 0:
-                    earliest_perp = session.query(PerpetualOHLCV.timestamp).filter_by(symbol=pair).order_by(PerpetualOHLCV.timestamp.asc()).first()
-                    latest_perp = session.query(PerpetualOHLCV.timestamp).filter_by(symbol=pair).order_by(PerpetualOHLCV.timestamp.desc()).first()
-                    print(f"  🔮 Perpetual OHLCV: {perp_count:,} records")
-                    print(f"     From: {earliest_perp[0].strftime('%Y-%m-%d %H:%M:%S')}")
-                    print(f"     To:   {latest_perp[0].strftime('%Y-%m-%d %H:%M:%S')}")
-                else:
-                    print(f"  🔮 Perpetual OHLCV: No data")
-            except Exception as e:
-                print(f"  🔮 Perpetual OHLCV: Error - {e}")
-            
-            # Funding rate data
-            try:
-                funding_count = session.query(FundingRate).filter_by(symbol=pair).count()
-                if funding_count > 0:
-                    earliest_funding = session.query(FundingRate.timestamp).filter_by(symbol=pair).order_by(FundingRate.timestamp.asc()).first()
-                    latest_funding = session.query(FundingRate.timestamp).filter_by(symbol=pair).order_by(FundingRate.timestamp.desc()).first()
-                    print(f"  💸 Funding Rates: {funding_count:,} records")
-                    print(f"     From: {earliest_funding[0].strftime('%Y-%m-%d %H:%M:%S')}")
-                    print(f"     To:   {latest_funding[0].strftime('%Y-%m-%d %H:%M:%S')}")
-                    
-                    # Show some recent funding rates
-                    recent_rates = session.query(FundingRate).filter_by(symbol=pair).order_by(FundingRate.timestamp.desc()).limit(3).all()
-                    if recent_rates:
-                        print(f"     Recent rates:")
-                        for rate in recent_rates:
-                            annual_rate = rate.funding_rate * 365 * 3 * 100 if rate.funding_rate else 0
-                            print(f"       {rate.timestamp.strftime('%Y-%m-%d %H:%M')}: {rate.funding_rate:.6f} ({annual_rate:+.2f}% annual)")
-                else:
-                    print(f"  💸 Funding Rates: No data")
-            except Exception as e:
-                print(f"  💸 Funding Rates: Error - {e}")
+            for model, label in PAIR_SUMMARY_TABLES.items():
+                summary = summaries[model]
+                if isinstance(summary, Exception):
+                    print(f"  {label}: Error - {summary}")
+                    continue
+                
+                if pair not in summary:
+                    print(f"  {label}: No data")
+                    continue
+                
+                count, earliest, latest = summary[pair]
+                print(f"  {label}: {count:,} records")
+                print(f"     From: {earliest.strftime('%Y-%m-%d %H:%M:%S')}")
+                print(f"     To:   {latest.strftime('%Y-%m-%d %H:%M:%S')}")
+                
+                # Show some recent funding rates
+                if model is FundingRate and recent_funding.get(pair):
+                    print(f"     Recent rates:")
+                    for timestamp, funding_rate in recent_funding[pair]:
+                        annual_rate = funding_rate * ANNUAL_FUNDING_PCT_MULT if funding_rate else 0
+                        print(f"       {timestamp.strftime('%Y-%m-%d %H:%M')}: {funding_rate:.6f} ({annual_rate:+.2f}% annual)")
         
         print("\n" + "="*60)
         print("📈 SAMPLE DATA PREVIEW")
@@ -127,7 +144,7 @@ def check_database():
             # Recent funding rate
             recent_funding = session.query(FundingRate).order_by(FundingRate.timestamp.desc()).first()
             if recent_funding:
-                annual_rate = recent_funding.funding_rate * 365 * 3 * 100 if recent_funding.funding_rate else 0
+                annual_rate = recent_funding.funding_rate * ANNUAL_FUNDING_PCT_MULT if recent_funding.funding_rate else 0
                 print(f"\n💸 Most Recent Funding Rate:")
                 print(f"   Symbol: {recent_funding.symbol}")
                 print(f"   Time: {recent_funding.timestamp}")
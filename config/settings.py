@@ -1,18 +1,38 @@
 import os
+from functools import lru_cache
 from pathlib import Path
+from types import MappingProxyType
 
 # --- Project Configuration ---
 PROJECT_ROOT = Path(__file__).parent.parent
 DATA_DIR = PROJECT_ROOT / "data"
 LOGS_DIR = PROJECT_ROOT / "logs"
 
-# Ensure directories exist
-DATA_DIR.mkdir(exist_ok=True)
-LOGS_DIR.mkdir(exist_ok=True)
+@lru_cache(maxsize=1)
+def ensure_dirs():
+    """Create DATA_DIR and LOGS_DIR (once per process) before writing into them."""
+    DATA_DIR.mkdir(exist_ok=True)
+    LOGS_DIR.mkdir(exist_ok=True)
 
 # --- Database Configuration ---
 DATABASE_PATH = f"sqlite:///{PROJECT_ROOT / 'funding_rate_data.db'}"
 
+DATABASE_POOL = {
+    'pool_size': 20,  # Connections kept open for concurrent collectors
+    'max_overflow': 20,  # Extra connections allowed under burst load
+    'pool_pre_ping': True,  # Detect stale connections before use
+    'pool_recycle': 1800,  # Recycle connections after 30 minutes
+}
+
+# Applied to every new SQLite connection
+SQLITE_PRAGMAS = {
+    'journal_mode': 'WAL',  # Readers proceed while a bulk insert is committing
+    'synchronous': 'NORMAL',  # fsync on checkpoint rather than every commit
+    'temp_store': 'MEMORY',  # Keep sort/temp tables for GROUP BY queries off disk
+    'cache_size': -64000,  # 64 MB page cache per connection
+    'mmap_size': 268435456,  # Memory-map up to 256 MB of the database file
+}
+
 # --- Exchange Configuration ---
 EXCHANGE = 'bybit'
 
@@ -43,10 +63,16 @@ DATA_COLLECTION = {
     'interval': '1m',  # 1-minute candles
     'lookback_days': 180,  # 6 months of historical data (180 days)
     'funding_rate_interval': 8,  # Funding rates every 8 hours
-    'max_retries': 3,
-    'retry_delay': 5,  # seconds
+    'max_retries': 5,
+    'retry_delay': 0.5,  # seconds, base delay doubled on each retry
+    'retry_max_delay': 60,  # seconds, cap for a single backoff
     'batch_size': 1000,  # Number of candles per API request
     'rate_limit_delay': 0.1,  # Delay between requests (100ms)
+    'ohlcv_storage': 'sqlite',  # 'sqlite' or 'parquet' (columnar files under data/, needs the 'parquet' extra)
+    'max_concurrent_pairs': 8,  # Trading pairs collected in parallel
+    'max_concurrent_requests': 16,  # In-flight OHLCV requests across all pairs
+    'commit_every_batches': 1,  # Batches per commit; keep at 1 on SQLite, which holds its write lock until commit
+    'funding_snapshot_interval': 60,  # seconds between stored funding rate snapshots per pair when streaming
 }
 
 # --- Funding Rate Configuration ---
@@ -57,6 +83,9 @@ FUNDING_RATE = {
     'annual_periods': 1095,  # 365 * 3 (funding every 8 hours)
 }
 
+# Multiplier from an 8-hour funding rate to an annualized percentage
+ANNUAL_FUNDING_PCT_MULT = FUNDING_RATE['annual_periods'] * 100
+
 # --- Backtesting Configuration ---
 BACKTESTING = {
     'initial_capital': 100000,  # $100,000 starting capital
@@ -97,6 +126,12 @@ API_CONFIG = {
     'sandbox': False,
     'timeout': 30000,  # 30 seconds
     'retry_on_error': True,
+    'markets_cache_ttl': 24 * 3600,  # Reuse cached load_markets() output for 24 hours
+    'http_connection_limit': 128,  # Pooled HTTP connections shared by ccxt clients
+    'http_connection_limit_per_host': 64,
+    'http_keepalive_timeout': 60,  # seconds an idle connection stays open for reuse
+    'burst_requests': 50,  # Requests get_exchange() clients may start per burst window (Bybit allows 600 per 5s per IP)
+    'burst_window': 1.0,  # seconds
 }
 
 # --- Logging Configuration ---
@@ -108,9 +143,40 @@ LOGGING = {
     'backup_count': 5,
 }
 
+# --- Read-only views ---
+def _freeze(value):
+    """Wrap nested config dicts in read-only mapping proxies."""
+    if isinstance(value, dict):
+        return MappingProxyType({key: _freeze(item) for key, item in value.items()})
+    return value
+
+# Settings are shared by every module (and every concurrent scan), so they
+# are exposed read-only; copy with dict(...) before overriding values locally
+DATABASE_POOL = _freeze(DATABASE_POOL)
+SQLITE_PRAGMAS = _freeze(SQLITE_PRAGMAS)
+TRADING_PAIRS = _freeze(TRADING_PAIRS)
+DATA_COLLECTION = _freeze(DATA_COLLECTION)
+FUNDING_RATE = _freeze(FUNDING_RATE)
+BACKTESTING = _freeze(BACKTESTING)
+STRATEGY = _freeze(STRATEGY)
+RISK_MANAGEMENT = _freeze(RISK_MANAGEMENT)
+API_CONFIG = _freeze(API_CONFIG)
+LOGGING = _freeze(LOGGING)
+
+# Symbol lists derived from TRADING_PAIRS, in the same order
+PAIR_NAMES = tuple(TRADING_PAIRS)
+SPOT_SYMBOLS = tuple(pair_info['spot'] for pair_info in TRADING_PAIRS.values())
+PERP_SYMBOLS = tuple(pair_info['perpetual'] for pair_info in TRADING_PAIRS.values())
+
 # --- Environment Variables ---
+@lru_cache(maxsize=1)
 def get_api_credentials():
-    """Get API credentials from environment variables."""
+    """
+    Get API credentials from environment variables.
+    
+    The environment is read once per process; call
+    get_api_credentials.cache_clear() after rotating keys.
+    """
     return {
         'apiKey': os.getenv('BYBIT_API_KEY'),
         'secret': os.getenv('BYBIT_API_SECRET'),
@@ -4,83 +4,106 @@ Debug script to see current market data and funding rates
 """
 
 import asyncio
-import ccxt.async_support as ccxt
-import sys
-import os
 from datetime import datetime
 
-# Add project root to path
-sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+from app.utils.exchange import close_exchanges, get_exchange, throttled
+from app.utils import event_loop
+from app.utils.console import get_console_logger
+from config.settings import ANNUAL_FUNDING_PCT_MULT, PERP_SYMBOLS, SPOT_SYMBOLS, TRADING_PAIRS
 
-from config.settings import TRADING_PAIRS, get_api_credentials
+logger = get_console_logger(__name__)
+
+MIN_FUNDING_RATE = 0.00005  # Aggressive threshold
+
+# Each pair's block is one logging call, so it reaches stdout in a single write
+PAIR_HEADER = "\n💰 %s\n" + "-" * 40 + "\n"
+PAIR_REPORT = PAIR_HEADER + (
+    "📈 Spot Price: $%s\n"
+    "🔮 Futures Price: $%s\n"
+    "💸 Funding Rate: %.6f (%+.2f%% annual)\n"
+    "📊 Basis: %+.1f bps\n"
+    "📈 24h Volume: $%s\n"
+    "⏰ Next Funding: %s\n"
+    "%s"
+)
+
+def pick(results, symbol):
+    """Return one symbol's entry from a batched response, re-raising if the batch failed."""
+    if isinstance(results, Exception):
+        raise results
+    return results[symbol]
 
 async def debug_market_data():
     """Debug current market data and funding rates."""
-    print("🔍 DEBUGGING CURRENT MARKET DATA")
-    print("=" * 60)
-    
-    credentials = get_api_credentials()
-    exchange_config = {
-        'apiKey': credentials['apiKey'],
-        'secret': credentials['secret'],
-        'testnet': credentials['testnet'],
-        'enableRateLimit': True,
-    }
+    logger.info("🔍 DEBUGGING CURRENT MARKET DATA")
+    logger.info("=" * 60)
     
-    async with ccxt.bybit(exchange_config) as exchange:
-        await exchange.load_markets()
+    # One client per market type: concurrent fetches can't share a toggled
+    # options['defaultType']
+    try:
+        spot_exchange = await get_exchange('spot')
+        futures_exchange = await get_exchange('future')
+        
+        # One batched request each for spot tickers, perpetual tickers and
+        # funding rates covers every pair
+        spot_tickers, futures_tickers, funding_rates = await asyncio.gather(
+            throttled(spot_exchange.fetch_tickers, list(SPOT_SYMBOLS)),
+            throttled(futures_exchange.fetch_tickers, list(PERP_SYMBOLS)),
+            throttled(futures_exchange.fetch_funding_rates, list(PERP_SYMBOLS)),
+            return_exceptions=True
+        )
         
         for pair_name, pair_info in TRADING_PAIRS.items():
-            print(f"\n💰 {pair_name}")
-            print("-" * 40)
-            
             try:
-                # Get spot data
-                exchange.options['defaultType'] = 'spot'
-                spot_ticker = await exchange.fetch_ticker(pair_info['spot'])
+                spot_ticker = pick(spot_tickers, pair_info['spot'])
+                futures_ticker = pick(futures_tickers, pair_info['perpetual'])
+                funding_rate_info = pick(funding_rates, pair_info['perpetual'])
+                
+                funding_rate = funding_rate_info['fundingRate']
                 
-                # Get futures data
-                exchange.options['defaultType'] = 'future'
-                futures_ticker = await exchange.fetch_ticker(pair_info['perpetual'])
-                funding_rate_info = await exchange.fetch_funding_rate(pair_info['perpetual'])
+                # Most pairs are below the threshold; skip the detailed metrics for them
+                if abs(funding_rate) < MIN_FUNDING_RATE:
+                    logger.info(PAIR_HEADER + "⚪ No opportunity (funding rate %.6f too low)",
+                                pair_name, funding_rate)
+                    continue
                 
                 # Calculate metrics
-                spot_price = float(spot_ticker['last'])
-                futures_price = float(futures_ticker['last'])
-                funding_rate = float(funding_rate_info['fundingRate'])
+                spot_price = spot_ticker['last']
+                futures_price = futures_ticker['last']
                 
                 # Calculate basis and annualized rate
                 basis = futures_price - spot_price
                 basis_bps = (basis / spot_price) * 10000
-                annual_funding_rate = funding_rate * 365 * 3 * 100
+                annual_funding_rate = funding_rate * ANNUAL_FUNDING_PCT_MULT
                 
                 # Get volume
                 volume_24h = futures_ticker.get('quoteVolume', 0)
                 
-                print(f"📈 Spot Price: ${spot_price:,.2f}")
-                print(f"🔮 Futures Price: ${futures_price:,.2f}")
-                print(f"💸 Funding Rate: {funding_rate:.6f} ({annual_funding_rate:+.2f}% annual)")
-                print(f"📊 Basis: {basis_bps:+.1f} bps")
-                print(f"📈 24h Volume: ${volume_24h:,.0f}")
-                print(f"⏰ Next Funding: {funding_rate_info.get('fundingDatetime', 'Unknown')}")
-                
-                # Show if this would be an opportunity
-                min_funding_rate = 0.00005  # Aggressive threshold
-                if abs(funding_rate) >= min_funding_rate:
-                    if funding_rate > 0:
-                        print(f"🟢 OPPORTUNITY: Long spot, short perpetual")
-                    else:
-                        print(f"🔴 OPPORTUNITY: Short spot, long perpetual")
+                if funding_rate > 0:
+                    direction = "🟢 OPPORTUNITY: Long spot, short perpetual"
                 else:
-                    print(f"⚪ No opportunity (funding rate too low)")
+                    direction = "🔴 OPPORTUNITY: Short spot, long perpetual"
+                
+                # %-style has no thousands separator, so those values are pre-formatted
+                logger.info(
+                    PAIR_REPORT, pair_name,
+                    format(spot_price, ',.2f'), format(futures_price, ',.2f'),
+                    funding_rate, annual_funding_rate, basis_bps, format(volume_24h, ',.0f'),
+                    funding_rate_info.get('fundingDatetime', 'Unknown'), direction
+                )
                 
             except Exception as e:
-                print(f"❌ Error getting data for {pair_name}: {e}")
+                logger.info(PAIR_HEADER + "❌ Error getting data for %s: %s", pair_name, pair_name, e)
+    finally:
+        await close_exchanges()
     
-    print(f"\n⚙️  THRESHOLDS:")
-    print(f"   Min Funding Rate: 0.00005 (1.83% annual)")
-    print(f"   Min Volume: $500,000")
-    print(f"   Max Spread: 15 bps")
+    logger.info(
+        "\n⚙️  THRESHOLDS:\n"
+        "   Min Funding Rate: %.5f (%.2f%% annual)\n"
+        "   Min Volume: $500,000\n"
+        "   Max Spread: 15 bps",
+        MIN_FUNDING_RATE, MIN_FUNDING_RATE * ANNUAL_FUNDING_PCT_MULT
+    )
 
 if __name__ == '__main__':
-    asyncio.run(debug_market_data())
+    event_loop.run(debug_market_data())
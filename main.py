@@ -1,59 +1,62 @@
 import argparse
-import asyncio
-import sys
-import os
-from datetime import datetime, timedelta
 
-# Add the project root to the Python path
-sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
-
-from app.data_collectors.data_collector import collect_data
-from app.data_collectors.historical_collector import HistoricalDataCollector
-from config.settings import DATABASE_PATH
-from app.models.funding_rate_models import Base
-from sqlalchemy import create_engine
+from app.data_collectors.data_collector import collect_data, stream_data
+from app.data_collectors.historical_collector import HistoricalDataCollector, setup_logging
+from app.database.engine import create_db_engine, init_db
+from config.settings import ensure_dirs
+from app.utils import event_loop
 
 def setup_database():
     """Initialize the database and create all tables."""
     print("Setting up database...")
-    engine = create_engine(DATABASE_PATH)
-    Base.metadata.create_all(engine)
+    ensure_dirs()
+    engine = create_db_engine()
+    init_db(engine)
+    engine.dispose()
     print("Database setup completed successfully.")
 
 def main():
     parser = argparse.ArgumentParser(description='Funding Rate Arbitrage System')
-    parser.add_argument('action', choices=[
-        'setup', 'collect', 'backtest', 'analyze', 'view'
-    ], help='Action to perform')
+    subparsers = parser.add_subparsers(dest='action', required=True, metavar='action',
+                                       help='Action to perform')
+    
+    subparsers.add_parser('setup', help='Create the database tables')
     
     # Data collection arguments
-    parser.add_argument('--days', type=int, default=180, 
+    collect_parser = subparsers.add_parser('collect', help='Collect market data')
+    collect_parser.add_argument('--days', type=int, default=180, 
                        help='Number of days of historical data to collect (default: 180 for 6 months)')
-    parser.add_argument('--live', action='store_true', 
+    collect_parser.add_argument('--live', action='store_true', 
                        help='Start live data collection')
-    parser.add_argument('--historical', action='store_true',
+    collect_parser.add_argument('--historical', action='store_true',
                        help='Collect comprehensive historical data (6 months by default)')
     
     # Backtesting arguments
-    parser.add_argument('--strategy', type=str, default='funding_rate',
+    backtest_parser = subparsers.add_parser('backtest', help='Backtest a strategy')
+    backtest_parser.add_argument('--strategy', type=str, default='funding_rate',
                        help='Strategy to backtest (default: funding_rate)')
-    parser.add_argument('--start', type=str, 
+    backtest_parser.add_argument('--start', type=str, 
                        help='Start date for backtest (YYYY-MM-DD)')
-    parser.add_argument('--end', type=str,
+    backtest_parser.add_argument('--end', type=str,
                        help='End date for backtest (YYYY-MM-DD)')
-    parser.add_argument('--capital', type=float, default=100000,
+    backtest_parser.add_argument('--capital', type=float, default=100000,
                        help='Initial capital for backtest (default: 100000)')
-    parser.add_argument('--max-position', type=float, default=0.1,
+    backtest_parser.add_argument('--max-position', type=float, default=0.1,
                        help='Maximum position size as fraction of capital (default: 0.1)')
     
     # Analysis arguments
-    parser.add_argument('--period', type=str, default='1m',
+    analyze_parser = subparsers.add_parser('analyze', help='Generate performance analysis')
+    analyze_parser.add_argument('--strategy', type=str, default='funding_rate',
+                       help='Strategy to analyze (default: funding_rate)')
+    analyze_parser.add_argument('--period', type=str, default='1m',
                        help='Analysis period (1w, 1m, 3m, 6m, 1y) (default: 1m)')
     
     # View arguments
-    parser.add_argument('--data', type=str, choices=['ohlcv', 'funding_rates', 'opportunities'],
+    view_parser = subparsers.add_parser('view', help='View stored data')
+    view_parser.add_argument('--data', type=str, required=True,
+                       choices=['ohlcv', 'funding_rates', 'opportunities'],
                        help='Type of data to view')
-    parser.add_argument('--pair', type=str, 
+    view_parser.add_argument('--pair', type=str, required=True,
                        help='Trading pair to view (e.g., BTC/USDT)')
 
     args = parser.parse_args()
@@ -66,15 +69,16 @@ def main():
             print("Starting live data collection...")
             print("Press Ctrl+C to stop")
             try:
-                asyncio.run(continuous_collection())
+                event_loop.run(continuous_collection())
             except KeyboardInterrupt:
                 print("\nData collection stopped.")
         elif args.historical:
+            setup_logging()
             print(f"Starting comprehensive historical data collection for {args.days} days...")
             print("This may take several hours depending on the amount of data.")
             print("Progress will be logged to logs/historical_collection.log")
             try:
-                asyncio.run(collect_comprehensive_historical_data(args.days))
+                event_loop.run(collect_comprehensive_historical_data(args.days))
                 print("\n✅ Historical data collection completed successfully!")
             except KeyboardInterrupt:
                 print("\n⚠️  Data collection interrupted by user")
@@ -82,7 +86,7 @@ def main():
                 print(f"\n❌ Error during historical collection: {e}")
         else:
             print(f"Collecting {args.days} days of basic historical data...")
-            asyncio.run(collect_historical_data(args.days))
+            event_loop.run(collect_historical_data(args.days))
             print("Historical data collection completed.")
             
     elif args.action == 'backtest':
@@ -94,9 +98,6 @@ def main():
         generate_analysis(args)
         
     elif args.action == 'view':
-        if not args.data or not args.pair:
-            print("Error: --data and --pair arguments are required for view action")
-            return
         view_data(args.data, args.pair)
 
 async def collect_historical_data(days):
@@ -111,16 +112,17 @@ async def collect_comprehensive_historical_data(days):
     await collector.collect_historical_data(days_back=days)
 
 async def continuous_collection():
-    """Continuously collect live data."""
-    while True:
-        try:
-            await collect_data()
-            print(f"Data collection cycle completed at {datetime.now()}")
-            # Wait for next collection cycle (e.g., every minute)
-            await asyncio.sleep(60)
-        except Exception as e:
-            print(f"Error in data collection: {e}")
-            await asyncio.sleep(60)  # Wait before retrying
+    """Continuously collect live data from the exchange's websocket streams."""
+    # One pooled engine for the backfill and the streams that follow it
+    engine = create_db_engine()
+    init_db(engine)
+    try:
+        # Backfill the most recent candles over REST once, then store pushed updates
+        await collect_data(engine=engine)
+        print("Backfill completed, streaming live updates...")
+        await stream_data(engine=engine)
+    finally:
+        engine.dispose()
 
 def run_backtest(args):
     """Run backtesting with specified parameters."""
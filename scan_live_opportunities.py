@@ -3,54 +3,65 @@
 Live opportunity scanner with ultra-aggressive settings to capture current opportunities
 """
 
-import asyncio
-import sys
-import os
+from types import MappingProxyType
 
-# Add project root to path
-sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+from app.scanners.opportunity_scanner import OpportunityScanner, setup_logging
+from app.utils import event_loop
+from app.utils.console import get_console_logger
+from config.settings import ANNUAL_FUNDING_PCT_MULT
 
-from app.scanners.opportunity_scanner import OpportunityScanner
+logger = get_console_logger(__name__)
+
+# Ultra-aggressive settings
+ULTRA_AGGRESSIVE_CONFIG = MappingProxyType({
+    'min_funding_rate': 0.00003,    # 0.003% (1.1% annually)
+    'max_risk_score': 10,           # Accept all risk levels
+    'min_volume_24h': 100000,       # $100k minimum
+    'max_spread_bps': 50,           # Very wide spreads accepted
+})
 
 async def scan_live_opportunities():
     """Scan with ultra-aggressive settings to find current opportunities."""
-    print("🔥 LIVE OPPORTUNITY SCANNER - ULTRA AGGRESSIVE MODE")
-    print("=" * 70)
-    
-    scanner = OpportunityScanner()
+    logger.info("🔥 LIVE OPPORTUNITY SCANNER - ULTRA AGGRESSIVE MODE")
+    logger.info("=" * 70)
     
-    # Ultra-aggressive settings
-    scanner.config.update({
-        'min_funding_rate': 0.00003,    # 0.003% (1.1% annually)
-        'max_risk_score': 10,           # Accept all risk levels
-        'min_volume_24h': 100000,       # $100k minimum
-        'max_spread_bps': 50,           # Very wide spreads accepted
-    })
+    scanner = OpportunityScanner(config=ULTRA_AGGRESSIVE_CONFIG)
     
-    print(f"⚙️  ULTRA-AGGRESSIVE CONFIGURATION:")
-    print(f"   Min Funding Rate: {scanner.config['min_funding_rate']:.6f} ({scanner.config['min_funding_rate']*365*3*100:.1f}% annual)")
-    print(f"   Max Risk Score: {scanner.config['max_risk_score']}/10")
-    print(f"   Min Volume: ${scanner.config['min_volume_24h']:,.0f}")
-    print(f"   Max Spread: {scanner.config['max_spread_bps']} bps")
-    print()
+    logger.info(
+        "⚙️  ULTRA-AGGRESSIVE CONFIGURATION:\n"
+        "   Min Funding Rate: %.6f (%.1f%% annual)\n"
+        "   Max Risk Score: %s/10\n"
+        "   Min Volume: $%s\n"
+        "   Max Spread: %s bps\n",
+        scanner.config['min_funding_rate'], scanner.config['min_funding_rate'] * ANNUAL_FUNDING_PCT_MULT,
+        scanner.config['max_risk_score'],
+        format(scanner.config['min_volume_24h'], ',.0f'),
+        scanner.config['max_spread_bps']
+    )
     
     try:
         opportunities = await scanner.scan_opportunities()
         await scanner.process_opportunities(opportunities)
         
         if opportunities:
-            print(f"\n🎯 SUCCESS: Found {len(opportunities)} live opportunities!")
-            print("\n💡 NEXT STEPS:")
-            print("1. Analyze each opportunity carefully")
-            print("2. Consider your risk tolerance")
-            print("3. Check funding times (next funding at 16:00 UTC)")
-            print("4. Monitor for changes in funding rates")
+            logger.info(
+                "\n🎯 SUCCESS: Found %d live opportunities!\n"
+                "\n💡 NEXT STEPS:\n"
+                "1. Analyze each opportunity carefully\n"
+                "2. Consider your risk tolerance\n"
+                "3. Check funding times (next funding at 16:00 UTC)\n"
+                "4. Monitor for changes in funding rates",
+                len(opportunities)
+            )
         else:
-            print("\n⚠️  No opportunities found even with ultra-aggressive settings")
-            print("💡 Market conditions may be unfavorable right now")
+            logger.warning("\n⚠️  No opportunities found even with ultra-aggressive settings")
+            logger.info("💡 Market conditions may be unfavorable right now")
             
     except Exception as e:
-        print(f"❌ Error during scan: {e}")
+        logger.error("❌ Error during scan: %s", e)
+    finally:
+        await scanner.close()
 
 if __name__ == '__main__':
-    asyncio.run(scan_live_opportunities())
+    setup_logging()
+    event_loop.run(scan_live_opportunities())
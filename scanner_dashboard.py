@@ -5,117 +5,146 @@ Funding Rate Arbitrage Scanner Dashboard
 A simplified interface to run and monitor the opportunity scanner.
 """
 
-import asyncio
 import argparse
-import sys
-import os
 from datetime import datetime
+from functools import lru_cache
+from types import MappingProxyType
 
-# Add project root to path
-sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+from app.scanners.opportunity_scanner import DEFAULT_SCANNER_CONFIG, OpportunityScanner, setup_logging
+from app.utils import event_loop
+from app.utils.console import get_console_logger
+from config.settings import ANNUAL_FUNDING_PCT_MULT, PAIR_NAMES
 
-from app.scanners.opportunity_scanner import OpportunityScanner
+logger = get_console_logger(__name__)
+
+# Threshold overrides applied to the scanner's defaults for each mode
+PRESETS = {
+    'normal': MappingProxyType({}),
+    'aggressive': MappingProxyType({
+        'min_funding_rate': 0.00005,  # 0.005% (1.83% annually)
+        'max_risk_score': 8,
+        'min_volume_24h': 500000,     # $500k minimum
+        'max_spread_bps': 15,
+    }),
+    'conservative': MappingProxyType({
+        'min_funding_rate': 0.0002,   # 0.02% (7.3% annually)
+        'max_risk_score': 5,
+        'min_volume_24h': 2000000,    # $2M minimum
+        'max_spread_bps': 8,
+    }),
+}
+
+@lru_cache(maxsize=1)
+def get_scanner(mode='normal'):
+    """Return the process's scanner for a mode, constructing it only once."""
+    return OpportunityScanner(config=PRESETS[mode])
 
 def print_banner():
     """Print the scanner banner."""
-    print("=" * 80)
-    print("🎯 FUNDING RATE ARBITRAGE OPPORTUNITY SCANNER")
-    print("=" * 80)
-    print("📊 Real-time monitoring of funding rate arbitrage opportunities")
-    print("💰 Tracks spot-futures spreads across BTC, ETH, and SOL on Bybit")
-    print("⚡ Identifies profitable long/short funding strategies")
-    print("=" * 80)
-    print()
+    logger.info("\n".join([
+        "=" * 80,
+        "🎯 FUNDING RATE ARBITRAGE OPPORTUNITY SCANNER",
+        "=" * 80,
+        "📊 Real-time monitoring of funding rate arbitrage opportunities",
+        "💰 Tracks spot-futures spreads across BTC, ETH, and SOL on Bybit",
+        "⚡ Identifies profitable long/short funding strategies",
+        "=" * 80,
+        "",
+    ]))
 
 def print_help():
     """Print usage help."""
-    print("📋 SCANNER COMMANDS:")
-    print()
-    print("  python scanner_dashboard.py                    # Start live scanning")
-    print("  python scanner_dashboard.py --quick            # Quick scan (single pass)")
-    print("  python scanner_dashboard.py --aggressive       # Lower thresholds for more opportunities")
-    print("  python scanner_dashboard.py --conservative     # Higher thresholds for safer opportunities")
-    print("  python scanner_dashboard.py --config           # Show current configuration")
-    print()
-    print("📊 OPPORTUNITY TYPES:")
-    print()
-    print("  🟢 LONG_FUNDING: Positive funding rates")
-    print("     Strategy: Long spot + Short perpetual (collect funding)")
-    print()
-    print("  🔴 SHORT_FUNDING: Negative funding rates") 
-    print("     Strategy: Short spot + Long perpetual (collect funding)")
-    print()
-    print("⚡ Press Ctrl+C to stop live scanning")
-    print()
+    logger.info("\n".join([
+        "📋 SCANNER COMMANDS:",
+        "",
+        "  python scanner_dashboard.py                    # Start live scanning",
+        "  python scanner_dashboard.py --quick            # Quick scan (single pass)",
+        "  python scanner_dashboard.py --aggressive       # Lower thresholds for more opportunities",
+        "  python scanner_dashboard.py --conservative     # Higher thresholds for safer opportunities",
+        "  python scanner_dashboard.py --config           # Show current configuration",
+        "",
+        "📊 OPPORTUNITY TYPES:",
+        "",
+        "  🟢 LONG_FUNDING: Positive funding rates",
+        "     Strategy: Long spot + Short perpetual (collect funding)",
+        "",
+        "  🔴 SHORT_FUNDING: Negative funding rates",
+        "     Strategy: Short spot + Long perpetual (collect funding)",
+        "",
+        "⚡ Press Ctrl+C to stop live scanning",
+        "",
+    ]))
 
 async def run_scanner(mode='normal'):
     """Run the scanner with specified mode."""
-    scanner = OpportunityScanner()
-    
-    # Adjust thresholds based on mode
     if mode == 'aggressive':
-        print("🔥 AGGRESSIVE MODE - Lower thresholds for more opportunities")
-        scanner.config.update({
-            'min_funding_rate': 0.00005,  # 0.005% (1.83% annually)
-            'max_risk_score': 8,
-            'min_volume_24h': 500000,     # $500k minimum
-            'max_spread_bps': 15,
-        })
+        logger.info("🔥 AGGRESSIVE MODE - Lower thresholds for more opportunities")
     elif mode == 'conservative':
-        print("🛡️  CONSERVATIVE MODE - Higher thresholds for safer opportunities")
-        scanner.config.update({
-            'min_funding_rate': 0.0002,   # 0.02% (7.3% annually)
-            'max_risk_score': 5,
-            'min_volume_24h': 2000000,    # $2M minimum
-            'max_spread_bps': 8,
-        })
+        logger.info("🛡️  CONSERVATIVE MODE - Higher thresholds for safer opportunities")
+    
+    scanner = get_scanner(mode)
     
-    print(f"⚙️  Configuration:")
-    print(f"   Min Funding Rate: {scanner.config['min_funding_rate']:.6f} ({scanner.config['min_funding_rate']*365*3*100:.1f}% annual)")
-    print(f"   Max Risk Score: {scanner.config['max_risk_score']}/10")
-    print(f"   Min Volume: ${scanner.config['min_volume_24h']:,.0f}")
-    print(f"   Max Spread: {scanner.config['max_spread_bps']} bps")
-    print(f"   Scan Interval: {scanner.config['scan_interval']} seconds")
-    print()
+    logger.info(
+        "⚙️  Configuration:\n"
+        "   Min Funding Rate: %.6f (%.1f%% annual)\n"
+        "   Max Risk Score: %s/10\n"
+        "   Min Volume: $%s\n"
+        "   Max Spread: %s bps\n"
+        "   Scan Interval: %s seconds\n",
+        scanner.config['min_funding_rate'], scanner.config['min_funding_rate'] * ANNUAL_FUNDING_PCT_MULT,
+        scanner.config['max_risk_score'],
+        format(scanner.config['min_volume_24h'], ',.0f'),
+        scanner.config['max_spread_bps'],
+        scanner.config['scan_interval']
+    )
     
     await scanner.start_scanning()
 
 async def quick_scan():
     """Perform a single scan and exit."""
-    print("🔍 Performing quick scan...")
-    scanner = OpportunityScanner()
+    logger.info("🔍 Performing quick scan...")
+    scanner = get_scanner()
     
     try:
         opportunities = await scanner.scan_opportunities()
         await scanner.process_opportunities(opportunities)
         
         if opportunities:
-            print(f"\n✅ Found {len(opportunities)} opportunities")
-            print("💡 Use 'python scanner_dashboard.py' for continuous monitoring")
+            logger.info("\n✅ Found %s opportunities", len(opportunities))
+            logger.info("💡 Use 'python scanner_dashboard.py' for continuous monitoring")
         else:
-            print("\n📊 No opportunities found at current thresholds")
-            print("💡 Try '--aggressive' mode for lower thresholds")
+            logger.info("\n📊 No opportunities found at current thresholds")
+            logger.info("💡 Try '--aggressive' mode for lower thresholds")
             
     except Exception as e:
-        print(f"❌ Error during scan: {e}")
+        logger.error("❌ Error during scan: %s", e)
+    finally:
+        await scanner.close()
 
 def show_config():
     """Show current scanner configuration."""
-    scanner = OpportunityScanner()
+    # Only the configuration is needed; no scanner (database, funding history) is built
+    config = DEFAULT_SCANNER_CONFIG
     
-    print("📋 CURRENT SCANNER CONFIGURATION")
-    print("=" * 50)
-    print(f"Min Funding Rate: {scanner.config['min_funding_rate']:.6f}")
-    print(f"Annual Threshold: {scanner.config['min_funding_rate']*365*3*100:.1f}%")
-    print(f"Max Risk Score: {scanner.config['max_risk_score']}/10")
-    print(f"Min Daily Volume: ${scanner.config['min_volume_24h']:,.0f}")
-    print(f"Max Spread: {scanner.config['max_spread_bps']} basis points")
-    print(f"Scan Interval: {scanner.config['scan_interval']} seconds")
-    print()
-    print("📊 MONITORED PAIRS:")
-    for pair in scanner.config.get('pairs', ['BTC/USDT', 'ETH/USDT', 'SOL/USDT']):
-        print(f"   • {pair}")
-    print()
+    logger.info(
+        "📋 CURRENT SCANNER CONFIGURATION\n"
+        + "=" * 50 + "\n"
+        "Min Funding Rate: %.6f\n"
+        "Annual Threshold: %.1f%%\n"
+        "Max Risk Score: %s/10\n"
+        "Min Daily Volume: $%s\n"
+        "Max Spread: %s basis points\n"
+        "Scan Interval: %s seconds\n"
+        "\n"
+        "📊 MONITORED PAIRS:\n"
+        "%s\n",
+        config['min_funding_rate'], config['min_funding_rate'] * ANNUAL_FUNDING_PCT_MULT,
+        config['max_risk_score'],
+        format(config['min_volume_24h'], ',.0f'),
+        config['max_spread_bps'],
+        config['scan_interval'],
+        "\n".join("   • " + pair for pair in PAIR_NAMES)
+    )
 
 def main():
     parser = argparse.ArgumentParser(description='Funding Rate Arbitrage Scanner Dashboard')
@@ -131,6 +160,7 @@ def main():
                        help='Show detailed scanner help')
     
     args = parser.parse_args()
+    setup_logging()
     
     # Handle special cases
     if args.help_scanner:
@@ -151,17 +181,17 @@ def main():
         from config.settings import get_api_credentials
         credentials = get_api_credentials()
         if not credentials.get('apiKey'):
-            print("❌ Error: API credentials not configured")
-            print("💡 Please check config/settings.py and ensure API credentials are set")
+            logger.error("❌ Error: API credentials not configured")
+            logger.info("💡 Please check config/settings.py and ensure API credentials are set")
             return
     except Exception as e:
-        print(f"❌ Error loading configuration: {e}")
+        logger.error("❌ Error loading configuration: %s", e)
         return
     
     # Run scanner based on mode
     try:
         if args.quick:
-            asyncio.run(quick_scan())
+            event_loop.run(quick_scan())
         else:
             mode = 'normal'
             if args.aggressive:
@@ -169,16 +199,16 @@ def main():
             elif args.conservative:
                 mode = 'conservative'
             
-            print("🚀 Starting live opportunity scanner...")
-            print("⚡ Press Ctrl+C to stop")
-            print()
-            asyncio.run(run_scanner(mode))
+            logger.info("🚀 Starting live opportunity scanner...")
+            logger.info("⚡ Press Ctrl+C to stop")
+            logger.info("")
+            event_loop.run(run_scanner(mode))
             
     except KeyboardInterrupt:
-        print("\n🛑 Scanner stopped by user")
+        logger.info("\n🛑 Scanner stopped by user")
     except Exception as e:
-        print(f"\n❌ Scanner error: {e}")
-        print("💡 Check logs/opportunity_scanner.log for details")
+        logger.error("\n❌ Scanner error: %s", e)
+        logger.info("💡 Check logs/opportunity_scanner.log for details")
 
 if __name__ == '__main__':
     main()
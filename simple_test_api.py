@@ -4,19 +4,25 @@ Simple script to test Bybit API connectivity.
 This version doesn't use dotenv - you need to set environment variables manually.
 """
 
-import sys
 import os
 import asyncio
 
-# Add project root to path
-sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+from app.utils import event_loop
+from app.utils.console import get_console_logger
+from config.settings import ANNUAL_FUNDING_PCT_MULT
 
-import ccxt.async_support as ccxt
+logger = get_console_logger(__name__)
+
+def pick(results, symbol):
+    """Return one symbol's entry from a batched response, re-raising if the batch failed."""
+    if isinstance(results, Exception):
+        raise results
+    return results[symbol]
 
 async def test_api_connection():
     """Test API connection and permissions."""
-    print("🔧 Testing Bybit API Connection...")
-    print("=" * 50)
+    logger.info("🔧 Testing Bybit API Connection...")
+    logger.info("=" * 50)
     
     # Get credentials from environment variables
     api_key = os.getenv('BYBIT_API_KEY', 'your_api_key_here')
@@ -24,20 +30,30 @@ async def test_api_connection():
     testnet = os.getenv('BYBIT_TESTNET', 'false').lower() == 'true'
     
     if api_key == 'your_api_key_here':
-        print("❌ API Key not configured!")
-        print("Please set BYBIT_API_KEY environment variable")
-        print("Or run: export BYBIT_API_KEY='your_actual_key'")
+        logger.error("❌ API Key not configured!")
+        logger.info("Please set BYBIT_API_KEY environment variable")
+        logger.info("Or run: export BYBIT_API_KEY='your_actual_key'")
         return False
     
     if api_secret == 'your_api_secret_here':
-        print("❌ API Secret not configured!")
-        print("Please set BYBIT_API_SECRET environment variable")
-        print("Or run: export BYBIT_API_SECRET='your_actual_secret'")
+        logger.error("❌ API Secret not configured!")
+        logger.info("Please set BYBIT_API_SECRET environment variable")
+        logger.info("Or run: export BYBIT_API_SECRET='your_actual_secret'")
         return False
     
-    print(f"✅ API Key: {api_key[:8]}***")
-    print(f"✅ Testnet: {testnet}")
-    print()
+    # ccxt builds its whole exchange registry on import; only pay for that
+    # once the credentials are known to be set
+    import ccxt.async_support as ccxt
+    from app.utils.exchange import create_http_session, load_markets_cached
+    
+    logger.info("✅ API Key: %s***", api_key[:8])
+    logger.info("✅ Testnet: %s", testnet)
+    logger.info("")
+    
+    # Both clients share one pooled keep-alive session, so concurrent
+    # requests reuse connections instead of each paying a TLS handshake
+    http_session = create_http_session()
+    exchange = perp_exchange = None
     
     # Initialize exchange
     try:
@@ -46,26 +62,25 @@ async def test_api_connection():
             'secret': api_secret,
             'testnet': testnet,
             'enableRateLimit': True,
+            'session': http_session,
         })
         
-        print("🔗 Testing API Connection...")
+        logger.info("🔗 Testing API Connection...")
         
         # Test: Get server time
         try:
             server_time = await exchange.fetch_time()
-            print(f"✅ Server Time: Connected")
+            logger.info("✅ Server Time: Connected")
         except Exception as e:
-            print(f"❌ Server Time Error: {e}")
-            await exchange.close()
+            logger.error("❌ Server Time Error: %s", e)
             return False
         
-        # Test: Get markets
+        # Test: Get markets (served from the on-disk cache while it is fresh)
         try:
-            await exchange.load_markets()
-            print("✅ Markets: Loaded successfully")
+            await load_markets_cached(exchange)
+            logger.info("✅ Markets: Loaded successfully")
         except Exception as e:
-            print(f"❌ Markets Error: {e}")
-            await exchange.close()
+            logger.error("❌ Markets Error: %s", e)
             return False
         
         # Test spot and futures data
@@ -75,67 +90,91 @@ async def test_api_connection():
             'SOL/USDT': 'SOL/USDT:USDT'
         }
         
-        print("\n📊 Testing Market Data Access...")
+        logger.info("\n📊 Testing Market Data Access...")
+        # Perpetual requests go through their own client so concurrent pairs
+        # never toggle a shared options['defaultType']
+        perp_exchange = ccxt.bybit({
+            'apiKey': api_key,
+            'secret': api_secret,
+            'testnet': testnet,
+            'enableRateLimit': True,
+            'options': {'defaultType': 'future'},
+            'session': http_session,
+        })
+        perp_exchange.set_markets(exchange.markets, exchange.currencies)
+        
+        # Batched endpoints: one request each for spot tickers, perpetual
+        # tickers and funding rates across all pairs
+        spot_tickers, perp_tickers, funding_rates = await asyncio.gather(
+            exchange.fetch_tickers(list(trading_pairs)),
+            perp_exchange.fetch_tickers(list(trading_pairs.values())),
+            perp_exchange.fetch_funding_rates(list(trading_pairs.values())),
+            return_exceptions=True
+        )
+        
         for spot_symbol, perp_symbol in trading_pairs.items():
             try:
                 # Test spot ticker
-                exchange.options['defaultType'] = 'spot'
-                spot_ticker = await exchange.fetch_ticker(spot_symbol)
-                print(f"✅ {spot_symbol} (spot): ${spot_ticker['last']:.2f}")
+                spot_ticker = pick(spot_tickers, spot_symbol)
+                logger.info("✅ %s (spot): $%.2f", spot_symbol, spot_ticker['last'])
                 
                 # Test perpetual ticker
-                exchange.options['defaultType'] = 'future'
-                perp_ticker = await exchange.fetch_ticker(perp_symbol)
-                print(f"✅ {perp_symbol} (perp): ${perp_ticker['last']:.2f}")
+                perp_ticker = pick(perp_tickers, perp_symbol)
+                logger.info("✅ %s (perp): $%.2f", perp_symbol, perp_ticker['last'])
                 
                 # Test funding rate
                 try:
-                    funding_info = await exchange.fetch_funding_rate(perp_symbol)
+                    funding_info = pick(funding_rates, perp_symbol)
                     if funding_info and 'fundingRate' in funding_info:
                         rate = funding_info['fundingRate']
-                        annual_rate = rate * 365 * 3 * 100 if rate else 0
-                        print(f"✅ Funding Rate: {rate:.6f} ({annual_rate:.2f}% annual)")
+                        annual_rate = rate * ANNUAL_FUNDING_PCT_MULT if rate else 0
+                        logger.info("✅ Funding Rate: %.6f (%.2f%% annual)", rate, annual_rate)
                     else:
-                        print("⚠️  Funding Rate: Available but format unexpected")
+                        logger.warning("⚠️  Funding Rate: Available but format unexpected")
                 except Exception as e:
-                    print(f"⚠️  Funding Rate: {e}")
+                    logger.warning("⚠️  Funding Rate: %s", e)
                 
-                print()  # Add space between pairs
+                logger.info("")  # Add space between pairs
                 
             except Exception as e:
-                print(f"❌ {spot_symbol}: {e}")
-        
-        await exchange.close()
+                logger.error("❌ %s: %s", spot_symbol, e)
         
-        print("=" * 50)
-        print("🎉 API Connection Test Complete!")
-        print("✅ Your API setup is working correctly")
+        logger.info("=" * 50)
+        logger.info("🎉 API Connection Test Complete!")
+        logger.info("✅ Your API setup is working correctly")
         return True
         
     except Exception as e:
-        print(f"❌ Connection Failed: {e}")
+        logger.error("❌ Connection Failed: %s", e)
         return False
+    finally:
+        # Close every client that was created, whichever path got here, then
+        # the session: ccxt leaves closing a session it was given to the caller
+        if perp_exchange is not None:
+            await perp_exchange.close()
+        if exchange is not None:
+            await exchange.close()
+        await http_session.close()
 
 def main():
     """Main function to run the test."""
-    print("Bybit API Connection Test (Simplified)")
-    print("Make sure you've set your environment variables:")
-    print("export BYBIT_API_KEY='your_key'")
-    print("export BYBIT_API_SECRET='your_secret'")
-    print()
+    logger.info("Bybit API Connection Test (Simplified)")
+    logger.info("Make sure you've set your environment variables:")
+    logger.info("export BYBIT_API_KEY='your_key'")
+    logger.info("export BYBIT_API_SECRET='your_secret'")
+    logger.info("")
     
     try:
-        success = asyncio.run(test_api_connection())
+        success = event_loop.run(test_api_connection())
         if success:
-            print("\n🚀 Next steps:")
-            print("1. Run: python main.py setup")
-            print("2. Then: python main.py collect --days 1")
+            logger.info("\n🚀 Next steps:")
+            logger.info("Run: python main.py collect --days 1")
         else:
-            print("\n❌ Please fix the issues above and try again")
+            logger.error("\n❌ Please fix the issues above and try again")
     except KeyboardInterrupt:
-        print("\n\n⚠️  Test interrupted by user")
+        logger.warning("\n\n⚠️  Test interrupted by user")
     except Exception as e:
-        print(f"\n❌ Unexpected error: {e}")
+        logger.error("\n❌ Unexpected error: %s", e)
 
 if __name__ == '__main__':
     main()
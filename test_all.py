@@ -0,0 +1,53 @@
+#!/usr/bin/env python3
+"""
+Run the API connection test and the scanner test together.
+
+Both tests share one exchange client and run concurrently in a single
+process, so imports and load_markets() are paid once.
+"""
+
+import asyncio
+
+from app.scanners.opportunity_scanner import setup_logging
+from app.utils import event_loop
+from app.utils.console import get_console_logger
+from app.utils.exchange import close_exchanges, get_exchange
+from test_api import test_api_connection
+from test_scanner import test_scanner
+
+logger = get_console_logger(__name__)
+
+async def run_all():
+    """Run both tests against one shared exchange client."""
+    try:
+        exchange = await get_exchange()
+    except Exception as e:
+        logger.error("❌ Connection Failed: %s", e)
+        return False, False
+    
+    try:
+        return await asyncio.gather(test_api_connection(exchange), test_scanner(exchange))
+    finally:
+        await close_exchanges()
+
+def main():
+    """Main function to run both tests."""
+    logger.info("Bybit API Connection and Scanner Test")
+    logger.info("")
+    
+    try:
+        api_ok, scanner_ok = event_loop.run(run_all())
+        logger.info("\n" + "=" * 50)
+        logger.info("%s API connection test", '✅' if api_ok else '❌')
+        logger.info("%s Scanner test", '✅' if scanner_ok else '❌')
+        if api_ok and scanner_ok:
+            logger.info("\n🚀 You can now run: python main.py setup")
+            logger.info("💡 Run 'python scanner_dashboard.py --quick' for a quick scan")
+        else:
+            logger.error("\n❌ Please fix the issues above and try again")
+    except KeyboardInterrupt:
+        logger.warning("\n\n⚠️  Test interrupted by user")
+
+if __name__ == '__main__':
+    setup_logging()
+    main()
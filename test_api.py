@@ -4,129 +4,190 @@ Simple script to test Bybit API connectivity and credentials.
 Run this after setting up your .env file to verify everything works.
 """
 
-import sys
-import os
 import asyncio
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
-# Add project root to path
-sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+from app.utils import event_loop
+from app.utils.console import get_console_logger
+from app.utils.exchange import close_exchanges, get_exchange, throttled
+from config.settings import ANNUAL_FUNDING_PCT_MULT, get_api_credentials, PERP_SYMBOLS, SPOT_SYMBOLS, TRADING_PAIRS
 
-import ccxt.async_support as ccxt
-from config.settings import get_api_credentials, TRADING_PAIRS
+logger = get_console_logger(__name__)
 
-async def test_api_connection():
-    """Test API connection and permissions."""
-    print("🔧 Testing Bybit API Connection...")
-    print("=" * 50)
+# (credentials key, .env.example placeholder, display name, environment variable)
+REQUIRED_CREDENTIALS = (
+    ('apiKey', 'your_api_key_here', 'API Key', 'BYBIT_API_KEY'),
+    ('secret', 'your_api_secret_here', 'API Secret', 'BYBIT_API_SECRET'),
+)
+
+# Seconds any single probe may take before it is reported as timed out
+PROBE_TIMEOUT = 5.0
+
+async def _probe(method, *args):
+    """Await a throttled ccxt call, failing fast with asyncio.TimeoutError on a slow endpoint."""
+    return await asyncio.wait_for(throttled(method, *args), timeout=PROBE_TIMEOUT)
+
+def _lookup(results, symbol):
+    """Return a symbol's entry from a batched fetch result, raising the error if its request failed."""
+    if isinstance(results, Exception):
+        raise results
+    if symbol not in results:
+        raise KeyError(f"no data returned for {symbol}")
+    if isinstance(results[symbol], Exception):
+        raise results[symbol]
+    return results[symbol]
+
+async def _fetch_funding_rates_each(exchange, symbols):
+    """Fallback for exchanges without fetchFundingRates: one concurrent request per symbol."""
+    results = await asyncio.gather(
+        *[_probe(exchange.fetch_funding_rate, symbol) for symbol in symbols],
+        return_exceptions=True,
+    )
+    return dict(zip(symbols, results))
+
+def _report_pair(pair, info, spot_tickers, perp_tickers, funding_rates):
+    """Return the report lines for one pair from the batched tickers and funding rates."""
+    # A failed ticker ends the pair's report; a failed funding rate is only a warning
+    lines = []
+    for symbol, tickers in ((info['spot'], spot_tickers), (info['perpetual'], perp_tickers)):
+        try:
+            ticker = _lookup(tickers, symbol)
+        except asyncio.TimeoutError:
+            lines.append("⏱️  %s: %s timed out after %gs" % (pair, symbol, PROBE_TIMEOUT))
+            return lines
+        except Exception as e:
+            lines.append("❌ %s: %s" % (pair, e))
+            return lines
+        lines.append("✅ %s: $%.2f" % (symbol, ticker['last']))
+    
+    try:
+        funding_rate = _lookup(funding_rates, info['perpetual'])
+    except asyncio.TimeoutError:
+        lines.append("⏱️  Funding Rate: timed out after %gs" % PROBE_TIMEOUT)
+        return lines
+    except Exception as e:
+        lines.append("⚠️  Funding Rate: %s" % e)
+        return lines
+    
+    if funding_rate and 'fundingRate' in funding_rate:
+        rate = funding_rate['fundingRate']
+        annual_rate = rate * ANNUAL_FUNDING_PCT_MULT  # Convert to annual %
+        lines.append("✅ Funding Rate: %.6f (%.2f%% annual)" % (rate, annual_rate))
+    else:
+        lines.append("⚠️  Funding Rate: Data format unexpected")
+    return lines
+
+async def test_api_connection(exchange=None):
+    """
+    Test API connection and permissions.
+    
+    Args:
+        exchange: Client to test with, left open for the caller; by default
+            the shared client is fetched here and closed when done
+    """
+    logger.info("🔧 Testing Bybit API Connection...")
+    logger.info("=" * 50)
     
     # Get credentials
     credentials = get_api_credentials()
     
-    if not credentials['apiKey'] or credentials['apiKey'] == 'your_api_key_here':
-        print("❌ API Key not configured!")
-        print("Please update BYBIT_API_KEY in your .env file")
-        return False
-    
-    if not credentials['secret'] or credentials['secret'] == 'your_api_secret_here':
-        print("❌ API Secret not configured!")
-        print("Please update BYBIT_API_SECRET in your .env file")
-        return False
+    for field, placeholder, label, env_var in REQUIRED_CREDENTIALS:
+        if credentials[field] in (None, '', placeholder):
+            logger.error("❌ %s not configured!", label)
+            logger.info("Please update %s in your .env file", env_var)
+            return False
     
-    print(f"✅ API Key: {credentials['apiKey'][:8]}***")
-    print(f"✅ Testnet: {credentials['testnet']}")
-    print()
+    logger.info("✅ API Key: %s***", credentials['apiKey'][:8])
+    logger.info("✅ Testnet: %s", credentials['testnet'])
+    logger.info("")
     
     # Initialize exchange
+    owns_exchange = exchange is None
     try:
-        exchange = ccxt.bybit({
-            'apiKey': credentials['apiKey'],
-            'secret': credentials['secret'],
-            'testnet': credentials['testnet'],
-            'enableRateLimit': True,
-        })
+        if owns_exchange:
+            # Process-wide client, shared with anything else the run touches
+            exchange = await get_exchange()
         
-        print("🔗 Testing API Connection...")
+        logger.info("🔗 Testing API Connection...")
+        
+        # The probes are independent, so send them all at once and report
+        # the results in order: one request each for spot tickers, perpetual
+        # tickers and funding rates (bybit infers spot vs. linear from the
+        # unified symbols)
+        if exchange.has.get('fetchFundingRates'):
+            funding_request = _probe(exchange.fetch_funding_rates, list(PERP_SYMBOLS))
+        else:
+            funding_request = _fetch_funding_rates_each(exchange, list(PERP_SYMBOLS))
+        server_time, balance, spot_tickers, perp_tickers, funding_rates = await asyncio.gather(
+            _probe(exchange.fetch_time),
+            _probe(exchange.fetch_balance),
+            _probe(exchange.fetch_tickers, list(SPOT_SYMBOLS)),
+            _probe(exchange.fetch_tickers, list(PERP_SYMBOLS)),
+            funding_request,
+            return_exceptions=True,
+        )
         
         # Test 1: Get server time
-        try:
-            server_time = await exchange.fetch_time()
-            print(f"✅ Server Time: {server_time}")
-        except Exception as e:
-            print(f"❌ Server Time Error: {e}")
+        if isinstance(server_time, asyncio.TimeoutError):
+            logger.warning("⏱️  Server Time: timed out after %gs", PROBE_TIMEOUT)
+            return False
+        if isinstance(server_time, Exception):
+            logger.error("❌ Server Time Error: %s", server_time)
             return False
+        logger.info("✅ Server Time: %s", server_time)
         
         # Test 2: Get account info (if possible)
-        try:
+        if isinstance(balance, asyncio.TimeoutError):
+            logger.warning("⏱️  Account Access: timed out after %gs", PROBE_TIMEOUT)
+        elif isinstance(balance, Exception):
             # This might fail with read-only keys, which is fine
-            balance = await exchange.fetch_balance()
-            print("✅ Account Access: Success")
-        except Exception as e:
-            if "permission" in str(e).lower() or "auth" in str(e).lower():
-                print("✅ Account Access: Read-only (expected for data collection)")
+            if "permission" in str(balance).lower() or "auth" in str(balance).lower():
+                logger.info("✅ Account Access: Read-only (expected for data collection)")
             else:
-                print(f"⚠️  Account Access: {e}")
+                logger.warning("⚠️  Account Access: %s", balance)
+        else:
+            logger.info("✅ Account Access: Success")
         
-        # Test 3: Fetch market data for each trading pair
-        print("\n📊 Testing Market Data Access...")
+        # Test 3: Market data for every trading pair
+        logger.info("\n📊 Testing Market Data Access...")
+        # One write for the whole report rather than one per line
+        report = []
         for pair, info in TRADING_PAIRS.items():
-            try:
-                # Test spot data
-                spot_ticker = await exchange.fetch_ticker(info['spot'])
-                print(f"✅ {info['spot']}: ${spot_ticker['last']:.2f}")
-                
-                # Test perpetual data
-                await exchange.load_markets()
-                exchange.options['defaultType'] = 'future'
-                perp_ticker = await exchange.fetch_ticker(info['perpetual'])
-                print(f"✅ {info['perpetual']}: ${perp_ticker['last']:.2f}")
-                
-                # Test funding rate
-                try:
-                    funding_rate = await exchange.fetch_funding_rate(info['perpetual'])
-                    if funding_rate and 'fundingRate' in funding_rate:
-                        rate = funding_rate['fundingRate']
-                        annual_rate = rate * 365 * 3 * 100  # Convert to annual %
-                        print(f"✅ Funding Rate: {rate:.6f} ({annual_rate:.2f}% annual)")
-                    else:
-                        print("⚠️  Funding Rate: Data format unexpected")
-                except Exception as e:
-                    print(f"⚠️  Funding Rate: {e}")
-                
-            except Exception as e:
-                print(f"❌ {pair}: {e}")
-        
-        await exchange.close()
+            report.extend(_report_pair(pair, info, spot_tickers, perp_tickers, funding_rates))
+        logger.info("\n".join(report))
         
-        print("\n" + "=" * 50)
-        print("🎉 API Connection Test Complete!")
-        print("✅ Your setup is ready for data collection")
+        logger.info("\n" + "=" * 50)
+        logger.info("🎉 API Connection Test Complete!")
+        logger.info("✅ Your setup is ready for data collection")
         return True
         
     except Exception as e:
-        print(f"❌ Connection Failed: {e}")
+        logger.error("❌ Connection Failed: %s", e)
         return False
+    finally:
+        if owns_exchange:
+            await close_exchanges()
 
 def main():
     """Main function to run the test."""
-    print("Bybit API Connection Test")
-    print("Make sure you've updated your .env file with real API credentials")
-    print()
+    logger.info("Bybit API Connection Test")
+    logger.info("Make sure you've updated your .env file with real API credentials")
+    logger.info("")
     
     try:
-        success = asyncio.run(test_api_connection())
+        success = event_loop.run(test_api_connection())
         if success:
-            print("\n🚀 You can now run: python main.py setup")
-            print("🚀 Then try: python main.py collect --days 1")
+            logger.info("\n🚀 You can now run: python main.py setup")
+            logger.info("🚀 Then try: python main.py collect --days 1")
         else:
-            print("\n❌ Please fix the issues above and try again")
+            logger.error("\n❌ Please fix the issues above and try again")
     except KeyboardInterrupt:
-        print("\n\n⚠️  Test interrupted by user")
+        logger.warning("\n\n⚠️  Test interrupted by user")
     except Exception as e:
-        print(f"\n❌ Unexpected error: {e}")
+        logger.error("\n❌ Unexpected error: %s", e)
 
 if __name__ == '__main__':
     main()
@@ -4,69 +4,104 @@ Test script for the opportunity scanner
 """
 
 import asyncio
-import sys
-import os
 
-# Add project root to path
-sys.path.insert(0, os.path.abspath(os.path.dirname(__file__)))
+from sqlalchemy import text
 
-from app.scanners.opportunity_scanner import OpportunityScanner
+from app.scanners.opportunity_scanner import OpportunityScanner, setup_logging
+from app.utils import event_loop
+from app.utils.console import get_console_logger
+from app.utils.exchange import close_exchanges, get_exchange
+from config.settings import get_api_credentials
 
-async def test_scanner():
-    """Test the scanner basic functionality."""
-    print("🧪 Testing Opportunity Scanner...")
-    print("=" * 50)
+logger = get_console_logger(__name__)
+
+def _check_database(scanner):
+    """Run a trivial query on a pooled connection (already opened by the scanner's init_db)."""
+    with scanner.engine.connect() as connection:
+        connection.execute(text('SELECT 1'))
+
+async def _check_exchange(exchange=None):
+    """Quick API test; the shared client loads markets on first use."""
+    if exchange is not None:
+        # The caller's client, which stays open
+        if not exchange.markets:
+            await exchange.load_markets()
+        return
+    try:
+        await get_exchange()
+    finally:
+        await close_exchanges()
+
+async def test_scanner(exchange=None):
+    """
+    Test the scanner basic functionality.
+    
+    Args:
+        exchange: Client for the exchange check, left open for the caller;
+            by default the shared client is fetched and closed
+    """
+    logger.info("🧪 Testing Opportunity Scanner...")
+    logger.info("=" * 50)
     
     try:
         # Test scanner initialization
-        print("1. Initializing scanner...")
+        logger.info("1. Initializing scanner...")
         scanner = OpportunityScanner()
-        print("   ✅ Scanner initialized successfully")
+        logger.info("   ✅ Scanner initialized successfully")
         
         # Test configuration
-        print("\n2. Testing configuration...")
-        print(f"   Min funding rate: {scanner.config['min_funding_rate']}")
-        print(f"   Max risk score: {scanner.config['max_risk_score']}")
-        print(f"   Min volume: ${scanner.config['min_volume_24h']:,}")
-        print("   ✅ Configuration loaded")
+        logger.info("\n2. Testing configuration...")
+        logger.info("   Min funding rate: %s", scanner.config['min_funding_rate'])
+        logger.info("   Max risk score: %s", scanner.config['max_risk_score'])
+        logger.info("   Min volume: $%s", format(scanner.config['min_volume_24h'], ','))
+        logger.info("   ✅ Configuration loaded")
+        
+        # Steps 3 and 4 are independent: probe the database (in a thread,
+        # since SQLAlchemy is synchronous) while the exchange loads markets
+        try:
+            credentials = get_api_credentials()
+            credentials_error = None
+        except Exception as e:
+            credentials, credentials_error = {}, e
+        
+        probes = [asyncio.to_thread(_check_database, scanner)]
+        if credentials.get('apiKey'):
+            probes.append(_check_exchange(exchange))
+        db_error, *exchange_errors = await asyncio.gather(*probes, return_exceptions=True)
         
         # Test database connection
-        print("\n3. Testing database connection...")
-        session = scanner.Session()
-        session.close()
-        print("   ✅ Database connection successful")
+        logger.info("\n3. Testing database connection...")
+        if db_error is not None:
+            raise db_error
+        logger.info("   ✅ Database connection successful")
         
         # Test exchange connection (if credentials available)
-        print("\n4. Testing exchange connection...")
-        try:
-            from config.settings import get_api_credentials
-            credentials = get_api_credentials()
-            if credentials.get('apiKey'):
-                print("   ✅ API credentials found")
-                
-                # Quick API test
-                import ccxt.async_support as ccxt
-                async with ccxt.bybit(scanner.exchange_config) as exchange:
-                    await exchange.load_markets()
-                    print("   ✅ Exchange connection successful")
+        logger.info("\n4. Testing exchange connection...")
+        if credentials_error is not None:
+            logger.warning("   ⚠️  Exchange connection issue: %s", credentials_error)
+        elif exchange_errors:
+            logger.info("   ✅ API credentials found")
+            if exchange_errors[0] is not None:
+                logger.warning("   ⚠️  Exchange connection issue: %s", exchange_errors[0])
             else:
-                print("   ⚠️  No API credentials - scanner will work but may have limited data")
-        except Exception as e:
-            print(f"   ⚠️  Exchange connection issue: {e}")
+                logger.info("   ✅ Exchange connection successful")
+        else:
+            logger.warning("   ⚠️  No API credentials - scanner will work but may have limited data")
         
-        print("\n✅ Scanner test completed successfully!")
-        print("\n🚀 Ready to scan for opportunities!")
+        logger.info("\n✅ Scanner test completed successfully!")
+        logger.info("\n🚀 Ready to scan for opportunities!")
         
     except Exception as e:
-        print(f"\n❌ Scanner test failed: {e}")
+        logger.error("\n❌ Scanner test failed: %s", e)
         return False
     
     return True
 
 if __name__ == '__main__':
-    success = asyncio.run(test_scanner())
+    setup_logging()
+    success = event_loop.run(test_scanner())
     if success:
-        print("\n💡 Run 'python scanner_dashboard.py --quick' for a quick scan")
-        print("💡 Run 'python scanner_dashboard.py' for continuous monitoring")
+        logger.info("\n💡 Run 'python scanner_dashboard.py --quick' for a quick scan")
+        logger.info("💡 Run 'python scanner_dashboard.py' for continuous monitoring")
     else:
-        print("\n💡 Please check the error above and ensure all dependencies are installed")
+        logger.info("\n💡 Please check the error above and ensure all dependencies are installed")